@@ -1,19 +1,192 @@
 import argparse
+import csv
+import glob
+import hashlib
 import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Set
+
 from extractor.pdf_extractor import extract_text_from_pdf
-from nlp.preprocess import clean_text, tokenize_lines
+from nlp.engine import iter_clean_lines
 from nlp.rule_extractor import extract_transactions
 
+CSV_FIELDS = ["file", "content_hash", "date", "description", "debit", "credit", "balance"]
+
+
+def file_hash(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def iter_input_files(patterns: List[str]) -> Iterator[str]:
+    """
+    Expand files, directories (searched recursively for PDFs) and globs,
+    yielding each path once.
+    """
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            found = []
+            for root, _, names in os.walk(pattern):
+                found.extend(os.path.join(root, n) for n in names if n.lower().endswith(".pdf"))
+            paths = sorted(found)
+        elif glob.has_magic(pattern):
+            paths = sorted(glob.glob(pattern, recursive=True))
+        else:
+            paths = [pattern]
+        for path in paths:
+            if path not in seen and os.path.isfile(path):
+                seen.add(path)
+                yield path
+
+
+def process_file(path: str, content_hash: str) -> Dict:
+    start = time.perf_counter()
+    try:
+        raw_text = extract_text_from_pdf(path)
+        transactions = extract_transactions(iter_clean_lines(raw_text))
+        error = None
+    except Exception as e:
+        transactions, error = [], f"{e.__class__.__name__}: {e}"
+    return {
+        "file": path,
+        "content_hash": content_hash,
+        "transactions": transactions,
+        "error": error,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _init_worker():
+    # Parallelism comes from the batch pool; OCR runs inline in each worker
+    # rather than every worker fanning out to its own cpu_count() pool.
+    from extractor import ocr_engine
+    ocr_engine.OCR_WORKERS = 1
+
+
+def load_state(path: Optional[str]) -> Set[str]:
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.split("\t", 1)[0].strip() for line in f if line.strip()}
+
+
+class ResultWriter:
+    """
+    Appends each file's transactions to JSONL or CSV as soon as it finishes.
+    """
+
+    def __init__(self, out_path: str, fmt: str):
+        self.fmt = fmt
+        if out_path == "-":
+            self.stream, self.owned = sys.stdout, False
+        else:
+            self.stream, self.owned = open(out_path, "a", newline="", encoding="utf-8"), True
+        if fmt == "csv":
+            self.writer = csv.DictWriter(self.stream, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if not self.owned or self.stream.tell() == 0:
+                self.writer.writeheader()
+
+    def write(self, result: Dict):
+        for txn in result["transactions"]:
+            record = {"file": result["file"], "content_hash": result["content_hash"], **txn}
+            if self.fmt == "csv":
+                self.writer.writerow(record)
+            else:
+                self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+    def close(self):
+        if self.owned:
+            self.stream.close()
+
+
+def run_batch(args) -> int:
+    state_path = args.state or (f"{args.out}.done" if args.out != "-" else None)
+    done = load_state(state_path)
+    workers = args.workers or os.cpu_count() or 1
+
+    writer = ResultWriter(args.out, args.format)
+    state = open(state_path, "a", encoding="utf-8") if state_path else None
+    stats = {"processed": 0, "skipped": 0, "failed": 0, "transactions": 0, "bytes": 0}
+    start = time.perf_counter()
+
+    def finish(result: Dict):
+        if result["error"]:
+            stats["failed"] += 1
+            print(f"FAILED {result['file']}: {result['error']}", file=sys.stderr)
+            return
+        writer.write(result)
+        stats["processed"] += 1
+        stats["transactions"] += len(result["transactions"])
+        # Recorded only after the rows are flushed, so an interrupted run
+        # redoes at most the files that were in flight.
+        if state:
+            state.write(f"{result['content_hash']}\t{result['file']}\n")
+            state.flush()
+        done.add(result["content_hash"])
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            in_flight = deque()
+            queued: Set[str] = set()
+            for path in iter_input_files(args.paths):
+                content_hash = file_hash(path)
+                if content_hash in done or content_hash in queued:
+                    stats["skipped"] += 1
+                    continue
+                queued.add(content_hash)
+                stats["bytes"] += os.path.getsize(path)
+                # Keep a bounded window of submitted files; results are
+                # written in input order as they complete.
+                if len(in_flight) >= workers * 2:
+                    finish(in_flight.popleft().result())
+                in_flight.append(pool.submit(process_file, path, content_hash))
+            while in_flight:
+                finish(in_flight.popleft().result())
+    finally:
+        writer.close()
+        if state:
+            state.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{stats['processed']} files processed, {stats['skipped']} skipped, {stats['failed']} failed; "
+        f"{stats['transactions']} transactions, {stats['bytes'] / (1024 * 1024):.1f} MB "
+        f"in {elapsed:.1f}s ({stats['processed'] / elapsed if elapsed else 0:.2f} files/s, "
+        f"{stats['transactions'] / elapsed if elapsed else 0:.1f} transactions/s, {workers} workers)",
+        file=sys.stderr,
+    )
+    return 1 if stats["failed"] else 0
+
 
 def main():
-    parser = argparse.ArgumentParser(description="Run extraction on a PDF file")
-    parser.add_argument("pdf_path", help="Path to the PDF file")
+    parser = argparse.ArgumentParser(description="Run extraction on PDF statements")
+    parser.add_argument("paths", nargs="+", metavar="pdf_path",
+                        help="PDF file, or with --batch any mix of files, directories and globs")
+    parser.add_argument("--batch", action="store_true",
+                        help="Process every input in parallel and write all transactions")
+    parser.add_argument("--out", default="-", help="Batch output file (appended to), '-' for stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--state", help="File of processed content hashes for resuming "
+                                        "(default: <out>.done when --out is a file)")
     args = parser.parse_args()
 
-    raw_text = extract_text_from_pdf(args.pdf_path)
-    cleaned_text = clean_text(raw_text)
-    lines = tokenize_lines(cleaned_text)
-    transactions = extract_transactions(lines)
+    if args.batch:
+        sys.exit(run_batch(args))
+
+    if len(args.paths) != 1:
+        parser.error("pass a single pdf_path, or use --batch")
+    raw_text = extract_text_from_pdf(args.paths[0])
+    transactions = extract_transactions(iter_clean_lines(raw_text))
 
     print(json.dumps(transactions[:5], indent=2))
 
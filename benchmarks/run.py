@@ -0,0 +1,292 @@
+"""
+Benchmark harness for the extraction pipeline.
+
+    python -m benchmarks.run --rows 5000 --repeat 5 --out bench.json
+    python -m benchmarks.run --stages csv,parse --rows 200000 --delimiter ";"
+    python -m benchmarks.run --stages e2e_csv,e2e_pdf     # needs a working DB
+    python -m benchmarks.run --stages ocr_backends --scanned-pages 5
+    python -m benchmarks.run --stages rasterize --scan-dpi 300
+
+Each stage runs in isolation on synthetic input (see benchmarks.synthetic)
+and reports latency percentiles, throughput and peak Python memory as JSON,
+so results can be diffed across commits. Stages whose system dependencies
+(Tesseract, Poppler, database) are missing are reported with an "error"
+instead of aborting the run.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from . import synthetic
+
+STAGES = ["parse", "rules", "csv", "pdf_digital", "pdf_table", "pdf_scanned", "ocr_backends", "rasterize", "e2e_csv", "e2e_pdf"]
+DEFAULT_STAGES = ["parse", "rules", "csv", "pdf_digital", "pdf_table", "pdf_scanned"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # nearest-rank
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def measure(fn: Callable[[], None], repeat: int, warmup: int = 1) -> Dict:
+    """
+    Time ``repeat`` runs of ``fn`` after ``warmup`` runs, then one extra run
+    under tracemalloc for peak memory (kept separate so tracing overhead
+    doesn't skew the timings).
+    """
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "runs": repeat,
+        "latency_s": {
+            "min": min(latencies),
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+        },
+        "peak_python_mb": round(peak / (1024 * 1024), 2),
+    }
+
+
+def _with_throughput(result: Dict, rows: int = 0, pages: int = 0) -> Dict:
+    p50 = result["latency_s"]["p50"] or 1e-9
+    if rows:
+        result["rows"] = rows
+        result["rows_per_s"] = round(rows / p50, 1)
+    if pages:
+        result["pages"] = pages
+        result["pages_per_s"] = round(pages / p50, 2)
+    return result
+
+
+def _write_temp(data: bytes, suffix: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _django_upload_view():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+    django.setup()
+    from django.test import RequestFactory
+    from extractor import result_cache
+    from extractor.views import PDFUploadView
+
+    # Measure real extraction, not cache hits on the repeated input
+    result_cache._cache = result_cache.TieredCache([])
+    return PDFUploadView.as_view(), RequestFactory()
+
+
+def _e2e(data: bytes, name: str, content_type: str) -> Callable[[], None]:
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.db import transaction
+
+    view, factory = _django_upload_view()
+
+    def run():
+        request = factory.post("/api/extractor/upload/", {"file": SimpleUploadedFile(name, data, content_type)})
+        with transaction.atomic():
+            response = view(request)
+            transaction.set_rollback(True)  # leave the DB as we found it
+        if response.status_code != 200:
+            raise RuntimeError(f"upload returned {response.status_code}: {response.data}")
+    return run
+
+
+def run_stage(stage: str, args, rows: List[Dict]) -> Dict:
+    pages = max(1, -(-len(rows) // args.rows_per_page))
+
+    if stage == "parse":
+        from extractor.text_parser import parse_bank_statement
+        text = synthetic.make_statement_text(rows)
+        return _with_throughput(measure(lambda: parse_bank_statement(text), args.repeat), rows=len(rows))
+
+    if stage == "rules":
+        from nlp.engine import iter_clean_lines
+        from nlp.rule_extractor import extract_transactions
+        text = synthetic.make_statement_text(rows)
+        return _with_throughput(
+            measure(lambda: extract_transactions(iter_clean_lines(text)), args.repeat), rows=len(rows),
+        )
+
+    if stage == "csv":
+        from extractor.csv_extractor import extract_text_from_csv
+        data = synthetic.make_csv(rows, delimiter=args.delimiter, encoding=args.encoding)
+        return _with_throughput(
+            measure(lambda: extract_text_from_csv(io.BytesIO(data)), args.repeat), rows=len(rows),
+        )
+
+    if stage in ("pdf_digital", "pdf_table"):
+        from extractor.pdf_extractor import extract_text_from_pdf
+        from extractor.table_extractor import TableExtractor
+        path = _write_temp(synthetic.make_digital_pdf(rows, args.rows_per_page), ".pdf")
+        try:
+            if stage == "pdf_digital":
+                fn = lambda: extract_text_from_pdf(path)
+            else:
+                fn = lambda: extract_text_from_pdf(path, tables=TableExtractor())
+            return _with_throughput(measure(fn, args.repeat), rows=len(rows), pages=pages)
+        finally:
+            os.remove(path)
+
+    if stage == "pdf_scanned":
+        from extractor.pdf_extractor import extract_text_from_pdf
+        scanned_rows = rows[:args.scanned_pages * args.rows_per_page]
+        scanned_pages = max(1, -(-len(scanned_rows) // args.rows_per_page))
+        path = _write_temp(
+            synthetic.make_scanned_pdf(scanned_rows, args.rows_per_page, dpi=args.scan_dpi, noise=args.noise), ".pdf",
+        )
+        try:
+            return _with_throughput(
+                measure(lambda: extract_text_from_pdf(path), args.repeat, warmup=0), pages=scanned_pages,
+            )
+        finally:
+            os.remove(path)
+
+    if stage == "ocr_backends":
+        # Same preprocessed page images through every OCR backend, inline
+        from extractor.ocr_backends import BACKENDS
+        from extractor.ocr_engine import preprocess_page
+        scanned_rows = rows[:args.scanned_pages * args.rows_per_page]
+        images = [
+            preprocess_page(img)
+            for img in synthetic.make_page_images(scanned_rows, args.rows_per_page, dpi=args.scan_dpi, noise=args.noise)
+        ]
+        results = {}
+        for name, backend_cls in BACKENDS.items():
+            try:
+                backend = backend_cls()
+                results[name] = _with_throughput(
+                    measure(lambda: [backend.image_to_string(img) for img in images], args.repeat),
+                    pages=len(images),
+                )
+            except Exception as e:
+                results[name] = {"error": f"{e.__class__.__name__}: {e}"}
+        return results
+
+    if stage == "rasterize":
+        # Render + preprocess every page of a digital PDF with each rasterizer
+        from extractor import ocr_engine
+        path = _write_temp(synthetic.make_digital_pdf(rows, args.rows_per_page), ".pdf")
+        default = ocr_engine.PDF_RASTERIZER
+        results = {}
+        try:
+            for name in ("pdfium", "pdf2image"):
+                ocr_engine.PDF_RASTERIZER = name
+                try:
+                    fn = lambda: [
+                        ocr_engine.preprocess_page(img)
+                        for img in ocr_engine.iter_page_images(path, dpi=args.scan_dpi)
+                    ]
+                    results[name] = _with_throughput(measure(fn, args.repeat), pages=pages)
+                except Exception as e:
+                    results[name] = {"error": f"{e.__class__.__name__}: {e}"}
+        finally:
+            ocr_engine.PDF_RASTERIZER = default
+            os.remove(path)
+        return results
+
+    if stage == "e2e_csv":
+        data = synthetic.make_csv(rows, delimiter=args.delimiter, encoding=args.encoding)
+        return _with_throughput(measure(_e2e(data, "bench.csv", "text/csv"), args.repeat), rows=len(rows))
+
+    if stage == "e2e_pdf":
+        data = synthetic.make_digital_pdf(rows, args.rows_per_page)
+        return _with_throughput(
+            measure(_e2e(data, "bench.pdf", "application/pdf"), args.repeat), rows=len(rows), pages=pages,
+        )
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except Exception:
+        return ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the statement extraction pipeline")
+    parser.add_argument("--stages", default=",".join(DEFAULT_STAGES),
+                        help=f"Comma-separated stages ({', '.join(STAGES)})")
+    parser.add_argument("--rows", type=int, default=5000, help="Transactions per synthetic statement")
+    parser.add_argument("--rows-per-page", type=int, default=50)
+    parser.add_argument("--scanned-pages", type=int, default=5, help="Page cap for the scanned PDF stage")
+    parser.add_argument("--scan-dpi", type=int, default=200, help="Resolution the scanned PDF is drawn at")
+    parser.add_argument("--noise", type=float, default=0.0, help="Fraction of scanned pixels flipped")
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    # Measure OCR, not page-cache hits on the repeated pages (read by
+    # extractor.ocr_engine at import, inherited by OCR workers)
+    os.environ.setdefault("OCR_CACHE", "0")
+
+    rows = synthetic.generate_rows(args.rows, seed=args.seed)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "params": vars(args),
+        },
+        "stages": {},
+    }
+    for stage in [s.strip() for s in args.stages.split(",") if s.strip()]:
+        try:
+            report["stages"][stage] = run_stage(stage, args, rows)
+        except Exception as e:
+            report["stages"][stage] = {"error": f"{e.__class__.__name__}: {e}"}
+        print(f"{stage}: done", file=sys.stderr)
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["meta"]["max_rss_mb"] = round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
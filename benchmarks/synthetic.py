@@ -0,0 +1,185 @@
+"""
+Synthetic bank statements for benchmarking: digital PDFs with a real text
+layer, image-only "scanned" PDFs, and CSV exports. Everything is generated
+from a seeded RNG so runs are comparable across commits.
+"""
+import csv
+import io
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+NARRATIONS = [
+    "UPI/{n}/GROCERY MART", "NEFT/{n}/SALARY CREDIT", "ATM WDL/{n}/MG ROAD",
+    "IMPS/{n}/RENT PAYMENT", "POS/{n}/FUEL STATION", "CHQ DEP/{n}/CLEARING",
+]
+
+COLUMNS = ["Date", "Narration", "Withdrawal Amt", "Deposit Amt", "Balance"]
+COLUMN_X = [40, 110, 330, 420, 500]  # points, on an A4 page
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+ROW_HEIGHT = 12
+
+
+def generate_rows(count: int, seed: int = 0, start: date = date(2024, 1, 1)) -> List[Dict]:
+    """
+    Transactions with a consistent running balance.
+    """
+    rng = random.Random(seed)
+    balance = 50000.0
+    day = start
+    rows = []
+    for n in range(count):
+        day += timedelta(days=rng.random() < 0.4)
+        amount = round(rng.uniform(10, 5000), 2)
+        is_debit = rng.random() < 0.7
+        balance = round(balance - amount if is_debit else balance + amount, 2)
+        rows.append({
+            "date": day,
+            "narration": rng.choice(NARRATIONS).format(n=100000 + n),
+            "debit": amount if is_debit else 0.0,
+            "credit": 0.0 if is_debit else amount,
+            "balance": balance,
+        })
+    return rows
+
+
+def _cells(row: Dict) -> List[str]:
+    return [
+        row["date"].strftime("%d-%m-%Y"),
+        row["narration"],
+        f"{row['debit']:,.2f}" if row["debit"] else "",
+        f"{row['credit']:,.2f}" if row["credit"] else "",
+        f"{row['balance']:,.2f}",
+    ]
+
+
+def _paginate(rows: List[Dict], rows_per_page: int) -> List[List[Dict]]:
+    return [rows[i:i + rows_per_page] for i in range(0, len(rows), rows_per_page)] or [[]]
+
+
+def _pdf_escape(text: str) -> bytes:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1")
+
+
+def make_digital_pdf(rows: List[Dict], rows_per_page: int = 50) -> bytes:
+    """
+    A minimal PDF with one Helvetica text object per cell, laid out as a
+    statement table with a header row on every page.
+    """
+    objects: List[Optional[bytes]] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page_number, page_rows in enumerate(_paginate(rows, rows_per_page), start=1):
+        y = PAGE_HEIGHT - 40
+        ops = [b"BT /F1 8 Tf"]
+        ops.append(b"1 0 0 1 40 %d Tm (%s) Tj" % (y, _pdf_escape(f"SYNTHETIC BANK STATEMENT - PAGE {page_number}")))
+        y -= 30
+        for x, label in zip(COLUMN_X, COLUMNS):
+            ops.append(b"1 0 0 1 %d %d Tm (%s) Tj" % (x, y, _pdf_escape(label)))
+        for row in page_rows:
+            y -= ROW_HEIGHT
+            for x, cell in zip(COLUMN_X, _cells(row)):
+                if cell:
+                    ops.append(b"1 0 0 1 %d %d Tm (%s) Tj" % (x, y, _pdf_escape(cell)))
+        ops.append(b"ET")
+        content = b"\n".join(ops)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, len(objects))
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids),
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def _font(size: int):
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def make_page_images(rows: List[Dict], rows_per_page: int = 50, dpi: int = 200, noise: float = 0.0, seed: int = 0) -> List:
+    """
+    The statement table drawn onto one RGB bitmap per page, with optional
+    salt-and-pepper ``noise`` (fraction of pixels flipped).
+    """
+    from PIL import Image, ImageDraw
+
+    scale = dpi / 72.0
+    font = _font(int(8 * scale))
+    rng = random.Random(seed)
+    pages = []
+    for page_number, page_rows in enumerate(_paginate(rows, rows_per_page), start=1):
+        img = Image.new("L", (int(PAGE_WIDTH * scale), int(PAGE_HEIGHT * scale)), 255)
+        draw = ImageDraw.Draw(img)
+        y = 40
+        draw.text((40 * scale, y * scale), f"SYNTHETIC BANK STATEMENT - PAGE {page_number}", fill=0, font=font)
+        y += 30
+        for x, label in zip(COLUMN_X, COLUMNS):
+            draw.text((x * scale, y * scale), label, fill=0, font=font)
+        for row in page_rows:
+            y += ROW_HEIGHT
+            for x, cell in zip(COLUMN_X, _cells(row)):
+                draw.text((x * scale, y * scale), cell, fill=0, font=font)
+        if noise:
+            pixels = img.load()
+            for _ in range(int(img.width * img.height * noise)):
+                px, py = rng.randrange(img.width), rng.randrange(img.height)
+                pixels[px, py] = 255 - pixels[px, py]
+        pages.append(img.convert("RGB"))
+    return pages
+
+
+def make_scanned_pdf(rows: List[Dict], rows_per_page: int = 50, dpi: int = 200, noise: float = 0.0, seed: int = 0) -> bytes:
+    """
+    Image-only PDF of make_page_images() pages.
+    """
+    pages = make_page_images(rows, rows_per_page, dpi=dpi, noise=noise, seed=seed)
+    out = io.BytesIO()
+    pages[0].save(out, format="PDF", save_all=True, append_images=pages[1:], resolution=dpi)
+    return out.getvalue()
+
+
+def make_csv(rows: List[Dict], delimiter: str = ",", encoding: str = "utf-8", preamble: int = 0) -> bytes:
+    """
+    A CSV export with ``preamble`` account-info lines before the header.
+    """
+    buf = io.StringIO()
+    for i in range(preamble):
+        buf.write(f"Account info line {i + 1}\n")
+    writer = csv.writer(buf, delimiter=delimiter, lineterminator="\n")
+    writer.writerow(["Date", "Narration", "Debit", "Credit", "Balance"])
+    for row in rows:
+        writer.writerow(_cells(row))
+    return buf.getvalue().encode(encoding)
+
+
+def make_statement_text(rows: List[Dict]) -> str:
+    """
+    Text as pdfplumber would flatten a digital statement, one row per line.
+    """
+    lines = ["SYNTHETIC BANK STATEMENT", "  ".join(COLUMNS)]
+    for row in rows:
+        lines.append("  ".join(cell for cell in _cells(row) if cell))
+    return "\n".join(lines)
@@ -141,6 +141,45 @@ MEDIA_ROOT = BASE_DIR / 'media'
 DATA_UPLOAD_MAX_MEMORY_SIZE = 25 * 1024 * 1024
 FILE_UPLOAD_MAX_MEMORY_SIZE = 25 * 1024 * 1024
 
+# Extraction result cache, keyed on the SHA-256 of the uploaded file.
+# Backends are checked in order: "memory" (per-process LRU) then "sqlite"
+# (shared on-disk tier). Any other entry is a dotted path to a class with
+# get(key) / set(key, value) methods.
+EXTRACTION_CACHE = {
+    'BACKENDS': [
+        {'BACKEND': 'memory', 'OPTIONS': {'max_bytes': 64 * 1024 * 1024}},
+        {'BACKEND': 'sqlite', 'OPTIONS': {
+            'path': BASE_DIR / 'cache' / 'extraction.sqlite3',
+            'max_bytes': 512 * 1024 * 1024,
+        }},
+    ],
+}
+
+# Read PDF transactions from word positions (extractor.table_extractor)
+# instead of regex-parsing the flattened page text.
+EXTRACTION_TABLE_MODE = True
+
+# Transactions written per batch while saving an upload (see
+# db.db_handler.bulk_insert_transactions). On PostgreSQL rows are streamed
+# with COPY unless EXTRACTION_BULK_COPY is False.
+EXTRACTION_BATCH_SIZE = 1000
+EXTRACTION_BULK_COPY = True
+
+# Default for ?dedup: skip transactions the account already has from an
+# earlier, overlapping upload (matched by Transaction.fingerprint)
+EXTRACTION_DEDUP = False
+
+# Background workers for ?mode=job uploads (see extractor.jobs)
+EXTRACTION_JOB_WORKERS = 2
+
+# Seconds without progress after which a queued or running job is taken
+# to have died with its worker process and is marked failed
+EXTRACTION_JOB_STALE_AFTER = 3600
+
+# Threads running extraction for the async upload endpoint
+# (extractor.async_views); 0 means one per CPU core
+EXTRACTION_ASYNC_WORKERS = 0
+
 # Basic logging
 LOGGING = {
     'version': 1,
@@ -3,14 +3,16 @@ from django.urls import path, include
 from django.http import JsonResponse
 from django.conf import settings
 from django.conf.urls.static import static
+from extractor.instrumentation import metrics_snapshot
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', lambda request: JsonResponse({"status": "ok", "endpoints": ["/api/health", "/api/extractor/upload/"]})),
+    path('', lambda request: JsonResponse({"status": "ok", "endpoints": ["/api/health", "/api/metrics", "/api/extractor/upload/", "/api/extractor/upload/async/", "/api/extractor/upload/stream/", "/api/extractor/jobs/<id>/", "/api/extractor/uploads/<id>/transactions/", "/api/extractor/uploads/<id>/export/", "/api/db/uploads/<id>/summary/", "/api/db/uploads/<id>/months/"]})),
     path('api/health', lambda request: JsonResponse({"status": "ok"})),
+    path('api/metrics', lambda request: JsonResponse(metrics_snapshot())),
     path('api/extractor/', include('extractor.urls')),
     path('api/nlp/', include('nlp.urls')),  # future
-    path('api/db/', include('db.urls')),    # future
+    path('api/db/', include('db.urls')),
 ]
 
 if settings.DEBUG:
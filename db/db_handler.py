@@ -0,0 +1,350 @@
+"""
+Query helpers for uploads and transactions.
+
+Each helper is shaped to hit one of the indexes on extractor's models:
+PDFUpload.content_hash (unique), Transaction (pdf, date) and
+Transaction (date).
+
+bulk_insert_transactions() is the write side: it streams parsed rows into
+the transaction table in fixed-size batches, using COPY on PostgreSQL, and
+can skip rows whose fingerprint the account already has. The rows it
+writes also feed a SummaryAccumulator, so upload and monthly totals are
+stored at ingest instead of being recomputed from transactions per request.
+"""
+import hashlib
+import io
+import re
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Max, Min, QuerySet
+
+from extractor.models import MonthlySummary, PDFUpload, Transaction, UploadSummary
+
+
+def upload_by_hash(content_hash: str) -> Optional[PDFUpload]:
+    """
+    The upload with these exact bytes, if it was processed before.
+    """
+    return PDFUpload.objects.filter(content_hash=content_hash).first()
+
+
+def upload_transactions(upload_id: int, start: Optional[date] = None, end: Optional[date] = None) -> QuerySet:
+    """
+    Transactions of one upload in date order, optionally limited to
+    [start, end]. Served by the (pdf, date) index.
+    """
+    qs = Transaction.objects.filter(pdf_id=upload_id)
+    if start is not None:
+        qs = qs.filter(date__gte=start)
+    if end is not None:
+        qs = qs.filter(date__lte=end)
+    return qs.order_by("date", "id")
+
+
+def transactions_between(start: date, end: date, upload_ids: Optional[Iterable[int]] = None) -> QuerySet:
+    """
+    Transactions dated within [start, end] across all uploads, or only
+    ``upload_ids``. Served by the (date) index, or (pdf, date) when
+    restricted to uploads.
+    """
+    qs = Transaction.objects.filter(date__range=(start, end))
+    if upload_ids is not None:
+        qs = qs.filter(pdf_id__in=list(upload_ids))
+    return qs.order_by("date", "id")
+
+
+def upload_date_span(upload_id: int) -> Dict:
+    """
+    First and last transaction date and row count of an upload.
+    """
+    return Transaction.objects.filter(pdf_id=upload_id).aggregate(
+        first_date=Min("date"), last_date=Max("date"), count=Count("id"),
+    )
+
+
+def existing_fingerprints(fingerprints: Iterable[str], exclude_upload: Optional[int] = None) -> Set[str]:
+    """
+    Which of ``fingerprints`` are already stored, in one query on the
+    fingerprint index. Rows of ``exclude_upload`` don't count.
+    """
+    qs = Transaction.objects.filter(fingerprint__in=list(fingerprints))
+    if exclude_upload is not None:
+        qs = qs.exclude(pdf_id=exclude_upload)
+    return set(qs.values_list("fingerprint", flat=True))
+
+
+_NARRATION_NOISE = re.compile(r"[^A-Z0-9]+")
+
+
+def _fingerprint_amount(value) -> str:
+    return f"{float(value):.2f}" if value not in (None, "") else "0.00"
+
+
+def transaction_fingerprint(account: str, txn: Dict) -> str:
+    """
+    Identity of a transaction across uploads of the same account: date,
+    amounts, balance and narration with case, spacing and punctuation
+    removed, so the same row from a monthly and a quarterly export matches.
+    """
+    narration = _NARRATION_NOISE.sub(" ", str(txn["narration"]).upper()).strip()
+    key = "|".join((
+        account,
+        txn["date"].isoformat(),
+        _fingerprint_amount(txn.get("debit")),
+        _fingerprint_amount(txn.get("credit")),
+        _fingerprint_amount(txn.get("balance")),
+        narration,
+    ))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+COPY_COLUMNS = ["pdf_id", "date", "narration", "debit", "credit", "balance", "fingerprint"]
+
+# COPY text format: backslash first, so the escapes it adds stay intact
+_COPY_NULL = "\\N"
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _to_decimal(value):
+    return Decimal(str(value)) if value not in (None, 0, 0.0, "") else None
+
+
+def _copy_amount(value) -> str:
+    # Same empty/zero -> NULL rule as _to_decimal; numeric() rounds the text
+    return str(value) if value not in (None, 0, 0.0, "") else _COPY_NULL
+
+
+Batch = List[Tuple[Dict, Optional[str]]]
+
+
+def _batches(
+    upload_id: int,
+    rows: Iterable[Dict],
+    size: int,
+    account: str,
+    dedup: bool,
+    stats: Dict,
+    summary: Optional["SummaryAccumulator"],
+) -> Iterator[Batch]:
+    """
+    Fingerprinted batches of ``rows``; with ``dedup``, rows whose
+    fingerprint another upload already stored are dropped (and counted in
+    stats["skipped"]) using one lookup per batch. Kept rows are added to
+    ``summary``.
+
+    Without an account there is nothing to scope fingerprints to: rows get
+    none and are never deduplicated, so unrelated uploads (CSVs, statements
+    without an account number) can't drop each other's transactions.
+    """
+    rows = iter(rows)
+    while True:
+        batch = [
+            (txn, transaction_fingerprint(account, txn) if account else None)
+            for txn in islice(rows, size)
+        ]
+        if not batch:
+            return
+        if dedup and account:
+            seen = existing_fingerprints({fp for _, fp in batch}, exclude_upload=upload_id)
+            if seen:
+                kept = [item for item in batch if item[1] not in seen]
+                stats["skipped"] += len(batch) - len(kept)
+                batch = kept
+        if summary is not None:
+            for txn, _ in batch:
+                summary.add(txn)
+        if batch:
+            yield batch
+
+
+def _copy_block(upload_id: int, batch: Batch) -> str:
+    return "".join(
+        f"{upload_id}\t{txn['date'].isoformat()}\t{str(txn['narration']).translate(_COPY_ESCAPES)}\t"
+        f"{_copy_amount(txn.get('debit'))}\t{_copy_amount(txn.get('credit'))}\t{_copy_amount(txn.get('balance'))}\t"
+        f"{fingerprint or _COPY_NULL}\n"
+        for txn, fingerprint in batch
+    )
+
+
+def _copy_insert(upload_id: int, batches: Iterator[Batch]) -> int:
+    quote = connection.ops.quote_name
+    sql = "COPY {} ({}) FROM STDIN".format(
+        quote(Transaction._meta.db_table), ", ".join(quote(c) for c in COPY_COLUMNS),
+    )
+    saved = 0
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, "copy"):
+            # psycopg 3: one COPY, fed a batch at a time
+            with raw.copy(sql) as copy:
+                for batch in batches:
+                    copy.write(_copy_block(upload_id, batch))
+                    saved += len(batch)
+        else:
+            # psycopg2: one COPY per batch
+            for batch in batches:
+                raw.copy_expert(sql, io.StringIO(_copy_block(upload_id, batch)))
+                saved += len(batch)
+    return saved
+
+
+def _bulk_create_insert(upload_id: int, batches: Iterator[Batch]) -> int:
+    saved = 0
+    for batch in batches:
+        Transaction.objects.bulk_create([
+            Transaction(
+                pdf_id=upload_id,
+                date=txn['date'],
+                narration=txn['narration'],
+                debit=_to_decimal(txn.get('debit')),
+                credit=_to_decimal(txn.get('credit')),
+                balance=_to_decimal(txn.get('balance')),
+                fingerprint=fingerprint,
+            )
+            for txn, fingerprint in batch
+        ])
+        saved += len(batch)
+    return saved
+
+
+def bulk_insert_transactions(
+    upload_id: int,
+    rows: Iterable[Dict],
+    batch_size: Optional[int] = None,
+    account: str = "",
+    dedup: bool = False,
+    summary: Optional["SummaryAccumulator"] = None,
+) -> Tuple[int, int]:
+    """
+    Insert parsed transactions for ``upload_id`` and return
+    (rows_written, duplicates_skipped). ``rows`` may be a generator: only
+    one batch is held in memory.
+
+    Every row is stored with its fingerprint for ``account``. With ``dedup``
+    rows already stored by another upload of the account are skipped; with
+    no account rows are stored unfingerprinted and never skipped.
+    Written rows are also added to ``summary`` if given.
+
+    On PostgreSQL rows are streamed with COPY; elsewhere (or with
+    EXTRACTION_BULK_COPY = False) each batch is one bulk_create. Call inside
+    transaction.atomic() to make the whole insert all-or-nothing.
+    """
+    batch_size = batch_size or getattr(settings, "EXTRACTION_BATCH_SIZE", 1000)
+    stats = {"skipped": 0}
+    batches = _batches(upload_id, rows, batch_size, account, dedup, stats, summary)
+    if connection.vendor == "postgresql" and getattr(settings, "EXTRACTION_BULK_COPY", True):
+        saved = _copy_insert(upload_id, batches)
+    else:
+        saved = _bulk_create_insert(upload_id, batches)
+    return saved, stats["skipped"]
+
+
+ZERO = Decimal("0")
+
+
+class _Totals:
+    def __init__(self):
+        self.count = 0
+        self.debit = ZERO
+        self.credit = ZERO
+        self.opening: Optional[Decimal] = None
+        self.closing: Optional[Decimal] = None
+        self.first_date: Optional[date] = None
+        self.last_date: Optional[date] = None
+
+    def add(self, day: date, debit: Decimal, credit: Decimal, balance: Optional[Decimal]):
+        if self.count == 0:
+            self.first_date = day
+            if balance is not None:
+                # Balance before the first transaction
+                self.opening = balance + debit - credit
+        self.count += 1
+        self.debit += debit
+        self.credit += credit
+        self.last_date = day
+        if balance is not None:
+            self.closing = balance
+
+    def fields(self) -> Dict:
+        return {
+            "transaction_count": self.count,
+            "debit_total": self.debit,
+            "credit_total": self.credit,
+            "opening_balance": self.opening,
+            "closing_balance": self.closing,
+        }
+
+
+class SummaryAccumulator:
+    """
+    Running upload and per-month totals, fed one row at a time in
+    statement order.
+    """
+
+    def __init__(self):
+        self.total = _Totals()
+        self.months: Dict[date, _Totals] = {}
+
+    def add(self, txn: Dict):
+        day = txn["date"]
+        debit = _to_decimal(txn.get("debit")) or ZERO
+        credit = _to_decimal(txn.get("credit")) or ZERO
+        balance = _to_decimal(txn.get("balance"))
+        self.total.add(day, debit, credit, balance)
+        month = day.replace(day=1)
+        if month not in self.months:
+            self.months[month] = _Totals()
+        self.months[month].add(day, debit, credit, balance)
+
+    def store(self, upload_id: int) -> UploadSummary:
+        """
+        Replace the stored summaries of ``upload_id`` with these totals.
+        """
+        with transaction.atomic():
+            UploadSummary.objects.filter(upload_id=upload_id).delete()
+            MonthlySummary.objects.filter(upload_id=upload_id).delete()
+            summary = UploadSummary.objects.create(
+                upload_id=upload_id,
+                first_date=self.total.first_date,
+                last_date=self.total.last_date,
+                **self.total.fields(),
+            )
+            MonthlySummary.objects.bulk_create([
+                MonthlySummary(upload_id=upload_id, month=month, **totals.fields())
+                for month, totals in sorted(self.months.items())
+            ])
+        return summary
+
+
+def upload_summary(upload_id: int) -> UploadSummary:
+    """
+    The stored summary of an upload. Uploads saved before summaries
+    existed are summarized from their transactions once, then stored; if a
+    concurrent request stores it first, that row is returned.
+    """
+    summary = UploadSummary.objects.filter(upload_id=upload_id).first()
+    if summary is not None:
+        return summary
+    accumulator = SummaryAccumulator()
+    rows = (
+        Transaction.objects.filter(pdf_id=upload_id)
+        .order_by("id")
+        .values("date", "debit", "credit", "balance")
+        .iterator(chunk_size=2000)
+    )
+    for row in rows:
+        accumulator.add(row)
+    try:
+        return accumulator.store(upload_id)
+    except IntegrityError:
+        return UploadSummary.objects.get(upload_id=upload_id)
+
+
+def monthly_summaries(upload_id: int) -> QuerySet:
+    upload_summary(upload_id)  # backfills older uploads
+    return MonthlySummary.objects.filter(upload_id=upload_id).order_by("month")
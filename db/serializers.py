@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from extractor.models import MonthlySummary, UploadSummary
+
+
+class MonthlySummarySerializer(serializers.ModelSerializer):
+    month = serializers.DateField(format="%Y-%m")
+
+    class Meta:
+        model = MonthlySummary
+        fields = ["month", "transaction_count", "debit_total", "credit_total",
+                  "opening_balance", "closing_balance"]
+
+
+class UploadSummarySerializer(serializers.ModelSerializer):
+    file_name = serializers.CharField(source="upload.file_name", read_only=True)
+    account = serializers.CharField(source="upload.account", read_only=True)
+
+    class Meta:
+        model = UploadSummary
+        fields = ["upload_id", "file_name", "account", "transaction_count", "debit_total", "credit_total",
+                  "opening_balance", "closing_balance", "first_date", "last_date"]
@@ -1,4 +1,7 @@
 from django.urls import path
+from .views import UploadMonthlySummaryView, UploadSummaryView
 
 urlpatterns = [
-] 
\ No newline at end of file
+    path('uploads/<int:pk>/summary/', UploadSummaryView.as_view(), name='upload-summary'),
+    path('uploads/<int:pk>/months/', UploadMonthlySummaryView.as_view(), name='upload-monthly-summary'),
+]
@@ -0,0 +1,30 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from extractor.models import PDFUpload
+from .db_handler import monthly_summaries, upload_summary
+from .serializers import MonthlySummarySerializer, UploadSummarySerializer
+
+
+class UploadSummaryView(APIView):
+    """
+    Totals, opening/closing balance and monthly rollups of one upload,
+    read from the summary tables written at ingest.
+    """
+
+    def get(self, request, pk):
+        get_object_or_404(PDFUpload, pk=pk)
+        data = UploadSummarySerializer(upload_summary(pk)).data
+        data["months"] = MonthlySummarySerializer(monthly_summaries(pk), many=True).data
+        return Response(data)
+
+
+class UploadMonthlySummaryView(APIView):
+    """
+    Monthly rollups of one upload only.
+    """
+
+    def get(self, request, pk):
+        get_object_or_404(PDFUpload, pk=pk)
+        return Response(MonthlySummarySerializer(monthly_summaries(pk), many=True).data)
@@ -0,0 +1,134 @@
+"""
+Async upload endpoint for ASGI deployments.
+
+The event loop only receives the request, runs async ORM lookups and builds
+the response. Hashing, pdfplumber, rasterization, Tesseract and the
+transactional insert run on a bounded thread pool, so many uploads can be
+in flight per process while extraction work stays capped at the pool size
+(OCR itself is further bounded by the shared OCR process pool).
+"""
+import os
+import asyncio
+import contextvars
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .instrumentation import collect_timings, span
+from .serializers import PDFUploadSerializer
+from .services import extract_upload, reusable_upload, save_transactions
+from .text_parser import detect_account
+from .views import dedup_requested, error_body, is_csv_upload, upload_body
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_upload_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, "EXTRACTION_ASYNC_WORKERS", 0) or os.cpu_count() or 1
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extraction-async")
+        return _executor
+
+
+async def _offload(fn, *args):
+    # copy_context() so spans recorded in the worker reach ?timings=1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_upload_executor(), contextvars.copy_context().run, fn, *args)
+
+
+def _parse_form(request) -> PDFUploadSerializer:
+    # Reading request.FILES parses the spooled body (and may write to disk)
+    data = request.POST.dict()
+    if 'file' in request.FILES:
+        data['file'] = request.FILES['file']
+    serializer = PDFUploadSerializer(data=data)
+    serializer.is_valid()
+    return serializer
+
+
+def _hash_upload(uploaded_file) -> str:
+    with span("upload.receive", bytes=uploaded_file.size or 0):
+        hasher = hashlib.sha256()
+        for chunk in uploaded_file.chunks():
+            hasher.update(chunk)
+        return hasher.hexdigest()
+
+
+def _extract_and_save(uploaded_file, is_csv: bool, content_hash: str, account: str, dedup: bool):
+    close_old_connections()
+    try:
+        if isinstance(uploaded_file, TemporaryUploadedFile):
+            source = uploaded_file.temporary_file_path()
+        else:
+            source = uploaded_file.file
+        with span("upload.extract"):
+            extracted_text, parsed, cached = extract_upload(source, is_csv, content_hash)
+        with span("upload.save") as save_span:
+            pdf_record, saved, skipped = save_transactions(
+                getattr(uploaded_file, 'name', 'uploaded.pdf'), parsed, content_hash,
+                account=account or detect_account(extracted_text), dedup=dedup,
+            )
+            save_span.add(rows=saved, skipped=skipped)
+        return extracted_text, pdf_record, saved, skipped, cached
+    finally:
+        close_old_connections()
+
+
+async def _upload(request):
+    serializer = await sync_to_async(_parse_form, thread_sensitive=False)(request)
+    if serializer.errors:
+        return serializer.errors, 400
+
+    uploaded_file = serializer.validated_data['file']
+    account = serializer.validated_data['account'].strip()
+    dedup = dedup_requested(request.GET.get('dedup') or request.POST.get('dedup'))
+    try:
+        content_hash = await _offload(_hash_upload, uploaded_file)
+
+        existing = await sync_to_async(reusable_upload, thread_sensitive=False)(content_hash, account, dedup)
+        if existing is not None:
+            count = await existing.transactions.acount()
+            return upload_body(request, existing, count, cached=True, duplicate=True), 200
+
+        extracted_text, pdf_record, saved, skipped, cached = await _offload(
+            _extract_and_save, uploaded_file, is_csv_upload(uploaded_file), content_hash, account, dedup,
+        )
+        body = upload_body(request, pdf_record, saved, cached, skipped=skipped)
+        if 'text' in request.GET.get('include', '').split(','):
+            body["text"] = extracted_text
+        return body, 200
+    except Exception as e:
+        logger.exception("Failed processing PDF upload")
+        return error_body(e), 500
+
+
+@csrf_exempt
+@require_POST
+async def upload_async(request):
+    """
+    Same contract as PDFUploadView (without ?mode=job), served without
+    holding a thread for the request's lifetime.
+    """
+    if request.GET.get('timings') in ('1', 'true'):
+        with collect_timings() as timings:
+            body, status = await _upload(request)
+        if status != 400:
+            body["timings"] = timings
+    else:
+        body, status = await _upload(request)
+    return JsonResponse(body, status=status)
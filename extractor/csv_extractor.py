@@ -1,26 +1,127 @@
 import csv
+import codecs
+import itertools
 from datetime import datetime
-from typing import List, Dict, Iterable
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 import io
 import re
+import numpy as np
 
+from .instrumentation import timed_iter
 
-def _decode_bytes(data: bytes) -> str:
-    for enc in ('utf-8-sig', 'utf-16', 'cp1252', 'latin-1'):
-        try:
-            return data.decode(enc)
-        except Exception:
-            continue
-    return data.decode('utf-8', errors='ignore')
+# Encoding and dialect are decided from this many leading bytes; the rest
+# of the file is decoded incrementally as it is read.
+SNIFF_BYTES = 64 * 1024
+
+DATE_KEYS = ['date', 'transaction date', 'txn date']
+NARRATION_KEYS = ['narration', 'description', 'details', 'particulars', 'remarks', 'chq/ref no', 'chq/ref', 'ref no']
+DEBIT_KEYS = ['debit', 'withdrawal', 'debits', 'dr', 'amount debit', 'withdrawal(dr)']
+CREDIT_KEYS = ['credit', 'deposit', 'cr', 'credits', 'amount credit', 'deposit(cr)']
+BALANCE_KEYS = ['balance', 'running balance', 'closing balance', 'available balance']
+
+DATE_FORMATS = ['%d-%m-%Y', '%Y-%m-%d', '%d/%m/%Y', '%d-%b-%Y', '%d %b %Y', '%d/%m/%y', '%d-%m-%y']
+AMOUNT_NOISE = [',', '₹', 'INR', 'DR', 'Dr', 'Cr', 'CR']
+
+# Header-mode rows are converted column-wise in chunks of this many rows
+CHUNK_ROWS = 5000
+DATE_SAMPLE_SIZE = 50
+
+DATE_REGEX = re.compile(r"^\s*\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\s*$")
+AMOUNT_CELL_REGEX = re.compile(r"[\d]+[\d,]*\.?\d*\s*(CR|Cr|DR|Dr)?$")
+AMOUNT_REGEX = re.compile(r"([\d,]+\.?\d*)\s*(CR|Cr|DR|Dr)?")
+DIGIT_REGEX = re.compile(r"\d")
+
+
+class _PrefixedReader(io.RawIOBase):
+    """
+    Raw stream that replays an already-read prefix before the rest of
+    ``stream``. Closing it leaves the underlying stream open.
+    """
+
+    def __init__(self, prefix: bytes, stream):
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._prefix:
+            n = min(len(b), len(self._prefix))
+            b[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        data = self._stream.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
 
 
-def _read_text(file_obj) -> str:
-    if isinstance(file_obj, (io.TextIOBase,)):
-        return file_obj.read()
-    data = file_obj.read()
-    if isinstance(data, str):
-        return data
-    return _decode_bytes(data or b"")
+def _legacy_char(byte: int) -> str:
+    try:
+        return bytes([byte]).decode('cp1252')
+    except UnicodeDecodeError:
+        return chr(byte)  # the five bytes cp1252 leaves undefined: latin-1
+
+
+_LEGACY_CHARS = [_legacy_char(b) for b in range(256)]
+
+
+def _legacy_fallback(error: UnicodeDecodeError) -> Tuple[str, int]:
+    # Decode each undecodable byte as cp1252 (latin-1 where undefined), so
+    # a stray legacy byte anywhere in the file neither raises nor turns
+    # into U+FFFD
+    bad = error.object[error.start:error.end]
+    return ''.join(_LEGACY_CHARS[b] for b in bad), error.end
+
+
+LEGACY_FALLBACK = 'csv-legacy-fallback'
+codecs.register_error(LEGACY_FALLBACK, _legacy_fallback)
+
+
+def _sniff_encoding(prefix: bytes) -> Tuple[str, str]:
+    """
+    Pick (encoding, errors) from the leading bytes of a file. The error
+    handler never raises, since bytes past the prefix are not sniffed.
+    """
+    if prefix.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig', LEGACY_FALLBACK
+    if prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16', 'replace'
+    try:
+        # final=False tolerates a multi-byte character cut off at the end
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8', LEGACY_FALLBACK
+    except UnicodeDecodeError:
+        return 'cp1252', LEGACY_FALLBACK
+
+
+def _open_text(file_obj) -> Tuple[Iterable[str], str]:
+    """
+    Wrap ``file_obj`` as an incrementally decoded stream of lines.
+    Returns (lines, sample) where sample is the start of the text.
+    """
+    if isinstance(file_obj, io.TextIOBase):
+        return _text_lines(file_obj.read(SNIFF_BYTES), file_obj)
+
+    prefix = file_obj.read(SNIFF_BYTES) or b""
+    if isinstance(prefix, str):
+        return _text_lines(prefix, file_obj)
+
+    encoding, errors = _sniff_encoding(prefix)
+    stream = io.TextIOWrapper(
+        io.BufferedReader(_PrefixedReader(prefix, file_obj)),
+        encoding=encoding, errors=errors, newline='',
+    )
+    sample = codecs.getincrementaldecoder(encoding)(errors=errors).decode(prefix, final=False)
+    return stream, sample
+
+
+def _text_lines(sample: str, file_obj) -> Tuple[Iterable[str], str]:
+    # Finish the partial last line so no row is split across the seam
+    if sample and not sample.endswith('\n'):
+        sample += file_obj.readline() or ''
+    return itertools.chain(io.StringIO(sample, newline=''), file_obj), sample
 
 
 def _canonical_key(key: str) -> str:
@@ -36,157 +137,257 @@ def _pick_header(fieldnames: List[str], candidates: List[str]) -> str:
     return ''
 
 
-def extract_text_from_csv(file_obj) -> List[Dict]:
-    text = _read_text(file_obj)
-    if not text:
-        return []
+def parse_date(s: str):
+    s = (s or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).date()
+        except Exception:
+            continue
+    return None
+
 
+def to_float(s: str) -> float:
+    s = (s or '').replace(',', '').replace('₹', '').replace('INR', '').strip()
+    s = s.replace('DR', '').replace('Dr', '').replace('Cr', '').replace('CR', '').strip()
     try:
-        sample = text[:4096]
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
-    except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ','
+        return float(s) if s else 0.0
+    except ValueError:
+        return 0.0
 
-    sio = io.StringIO(text)
-    reader = csv.DictReader(sio, dialect=dialect)
 
-    date_keys = ['date', 'transaction date', 'txn date']
-    narration_keys = ['narration', 'description', 'details', 'particulars', 'remarks', 'chq/ref no', 'chq/ref', 'ref no']
-    debit_keys = ['debit', 'withdrawal', 'debits', 'dr', 'amount debit', 'withdrawal(dr)']
-    credit_keys = ['credit', 'deposit', 'cr', 'credits', 'amount credit', 'deposit(cr)']
-    balance_keys = ['balance', 'running balance', 'closing balance', 'available balance']
+def infer_date_format(values: Iterable[str]) -> Optional[str]:
+    """
+    Return the DATE_FORMATS entry that parses the most of a sample of values.
+    """
+    sample = [v.strip() for v in values if v and v.strip()][:DATE_SAMPLE_SIZE]
+    best, best_hits = None, 0
+    for fmt in DATE_FORMATS:
+        hits = 0
+        for v in sample:
+            try:
+                datetime.strptime(v, fmt)
+                hits += 1
+            except ValueError:
+                continue
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+    return best
 
-    field_map: Dict[str, str] = {}
-    if reader.fieldnames:
-        field_map['date'] = _pick_header(reader.fieldnames, date_keys)
-        field_map['narration'] = _pick_header(reader.fieldnames, narration_keys)
-        field_map['debit'] = _pick_header(reader.fieldnames, debit_keys)
-        field_map['credit'] = _pick_header(reader.fieldnames, credit_keys)
-        field_map['balance'] = _pick_header(reader.fieldnames, balance_keys)
 
-    transactions: List[Dict] = []
+def parse_date_column(values: List[str], fmt: Optional[str]) -> List:
+    """
+    Parse a column of date strings, doing the work once per distinct value.
+    Values that don't match ``fmt`` fall back to parse_date.
+    """
+    if not values:
+        return []
+    uniques, inverse = np.unique(np.array([(v or '').strip() for v in values]), return_inverse=True)
+    parsed = np.empty(len(uniques), dtype=object)
+    for i, value in enumerate(uniques.tolist()):
+        date_val = None
+        if fmt and value:
+            try:
+                date_val = datetime.strptime(value, fmt).date()
+            except ValueError:
+                date_val = None
+        parsed[i] = date_val if date_val is not None else parse_date(value)
+    return parsed[inverse].tolist()
 
-    date_formats = ['%d-%m-%Y', '%Y-%m-%d', '%d/%m/%Y', '%d-%b-%Y', '%d %b %Y', '%d/%m/%y', '%d-%m-%y']
 
-    def parse_date(s: str):
-        s = (s or '').strip()
-        for fmt in date_formats:
+def parse_amount_column(values: List[str]) -> List[float]:
+    """
+    to_float() for a whole column: the currency/marker noise is stripped
+    from one joined string instead of cell by cell.
+    """
+    joined = '\n'.join(v or '' for v in values)
+    for token in AMOUNT_NOISE:
+        joined = joined.replace(token, '')
+    parts = joined.split('\n')
+    if len(parts) != len(values):  # a quoted cell contained a newline
+        return [to_float(v) for v in values]
+    try:
+        return [float(p) if p.strip() else 0.0 for p in parts]
+    except ValueError:
+        amounts = []
+        for part, value in zip(parts, values):
             try:
-                return datetime.strptime(s, fmt).date()
-            except Exception:
-                continue
+                amounts.append(float(part) if part.strip() else 0.0)
+            except ValueError:
+                amounts.append(to_float(value))
+        return amounts
+
+
+def _header_map(row: List[str]) -> Optional[Dict[str, int]]:
+    """
+    Map canonical fields to column indexes if ``row`` is a usable header.
+    """
+    field_map = {
+        'date': _pick_header(row, DATE_KEYS),
+        'narration': _pick_header(row, NARRATION_KEYS),
+        'debit': _pick_header(row, DEBIT_KEYS),
+        'credit': _pick_header(row, CREDIT_KEYS),
+        'balance': _pick_header(row, BALANCE_KEYS),
+    }
+    if not (field_map['date'] and field_map['balance']):
         return None
+    return {field: row.index(name) for field, name in field_map.items() if name}
 
-    def to_float(s: str) -> float:
-        s = (s or '').replace(',', '').replace('₹', '').replace('INR', '').strip()
-        s = s.replace('DR', '').replace('Dr', '').replace('Cr', '').replace('CR', '').strip()
-        try:
-            return float(s) if s else 0.0
-        except ValueError:
-            return 0.0
-
-    # Primary path: header-based
-    has_min_headers = bool(field_map.get('date')) and bool(field_map.get('balance'))
-    if has_min_headers:
-        for row in reader:
-            date_field = field_map.get('date') or 'Date'
-            narration_field = field_map.get('narration') or 'Narration'
-            debit_field = field_map.get('debit') or 'Debit'
-            credit_field = field_map.get('credit') or 'Credit'
-            balance_field = field_map.get('balance') or 'Balance'
-
-            date_val = parse_date(row.get(date_field, ''))
-            if not date_val:
-                continue
 
-            narration = (row.get(narration_field, '') or '').strip()
-            debit_str = row.get(debit_field, '') or ''
-            credit_str = row.get(credit_field, '') or ''
-            balance_str = row.get(balance_field, '') or ''
-
-            transactions.append({
-                'date': date_val,
-                'narration': narration,
-                'debit': to_float(debit_str),
-                'credit': to_float(credit_str),
-                'balance': to_float(balance_str),
-            })
-        if transactions:
-            return transactions
-
-    # Fallback: positional parsing (skip preamble until first date-like row)
-    sio2 = io.StringIO(text)
-    raw_reader = csv.reader(sio2, dialect=dialect)
-
-    date_regex = re.compile(r"^\s*\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\s*$")
-    started = False
-
-    for row in raw_reader:
-        if not row or all((c or '').strip() == '' for c in row):
-            continue
-        if not started:
-            first = (row[0] if len(row) > 0 else '').strip()
-            if date_regex.match(first):
-                started = True
-            else:
-                continue
-        # Now in data section; each row should start with a date
-        first = (row[0] if len(row) > 0 else '').strip()
-        if not date_regex.match(first):
-            continue
-        date_val = parse_date(first)
+def _cell(row: List[str], index: Optional[int]) -> str:
+    if index is None or index >= len(row):
+        return ''
+    return row[index] or ''
+
+
+def _header_chunk_transactions(rows: List[List[str]], columns: Dict[str, int], date_format: Optional[str]) -> Iterator[Dict]:
+    """
+    Convert a chunk of header-mode rows column by column.
+    """
+    def column(field: str) -> List[str]:
+        index = columns.get(field)
+        return [_cell(row, index) for row in rows]
+
+    dates = parse_date_column(column('date'), date_format)
+    narrations = column('narration')
+    debits = parse_amount_column(column('debit'))
+    credits = parse_amount_column(column('credit'))
+    balances = parse_amount_column(column('balance'))
+
+    for date_val, narration, debit, credit, balance in zip(dates, narrations, debits, credits, balances):
         if not date_val:
             continue
-
-        # Collect narration from middle textual columns
-        middle_cols = row[1:-1] if len(row) >= 3 else row[1:]
-        narration_parts = []
-        for c in middle_cols:
-            cs = (c or '').strip()
-            if not cs:
-                continue
-            if re.search(r"[\d]+[\d,]*\.?\d*\s*(CR|Cr|DR|Dr)?$", cs):
-                continue
-            narration_parts.append(cs)
-        narration = ' '.join(narration_parts).strip()
-
-        # Find numeric amounts and classify
-        nums = []
-        for c in row:
-            cs = (c or '').strip()
-            if re.search(r"\d", cs):
-                m = re.search(r"([\d,]+\.?\d*)\s*(CR|Cr|DR|Dr)?", cs)
-                if m:
-                    val = to_float(m.group(1) + (m.group(2) or ''))
-                    marker = (m.group(2) or '').upper()
-                    nums.append((val, marker, cs))
-        balance = 0.0
-        debit = 0.0
-        credit = 0.0
-        if nums:
-            balance = nums[-1][0]
-            # look for explicit DR/CR
-            for val, marker, cs in nums[:-1]:
-                if marker == 'DR':
-                    debit = val
-                elif marker == 'CR':
-                    credit = val
-            # if not found, use heuristics: first amount is txn, sign by keywords
-            if debit == 0.0 and credit == 0.0 and len(nums) >= 2:
-                txn_val = nums[0][0]
-                line_text = ' '.join(row).upper()
-                if 'DR' in line_text or 'WITHDRAW' in line_text:
-                    debit = txn_val
-                else:
-                    credit = txn_val
-
-        transactions.append({
+        yield {
             'date': date_val,
-            'narration': narration,
+            'narration': narration.strip(),
             'debit': debit,
             'credit': credit,
             'balance': balance,
-        })
+        }
 
-    return transactions 
\ No newline at end of file
+
+def _positional_transaction(row: List[str]) -> Optional[Dict]:
+    first = (row[0] if len(row) > 0 else '').strip()
+    if not DATE_REGEX.match(first):
+        return None
+    date_val = parse_date(first)
+    if not date_val:
+        return None
+
+    # Collect narration from middle textual columns
+    middle_cols = row[1:-1] if len(row) >= 3 else row[1:]
+    narration_parts = []
+    for c in middle_cols:
+        cs = (c or '').strip()
+        if not cs:
+            continue
+        if AMOUNT_CELL_REGEX.search(cs):
+            continue
+        narration_parts.append(cs)
+    narration = ' '.join(narration_parts).strip()
+
+    # Find numeric amounts and classify
+    nums = []
+    for c in row:
+        cs = (c or '').strip()
+        if DIGIT_REGEX.search(cs):
+            m = AMOUNT_REGEX.search(cs)
+            if m:
+                val = to_float(m.group(1) + (m.group(2) or ''))
+                marker = (m.group(2) or '').upper()
+                nums.append((val, marker, cs))
+    balance = 0.0
+    debit = 0.0
+    credit = 0.0
+    if nums:
+        balance = nums[-1][0]
+        # look for explicit DR/CR
+        for val, marker, cs in nums[:-1]:
+            if marker == 'DR':
+                debit = val
+            elif marker == 'CR':
+                credit = val
+        # if not found, use heuristics: first amount is txn, sign by keywords
+        if debit == 0.0 and credit == 0.0 and len(nums) >= 2:
+            txn_val = nums[0][0]
+            line_text = ' '.join(row).upper()
+            if 'DR' in line_text or 'WITHDRAW' in line_text:
+                debit = txn_val
+            else:
+                credit = txn_val
+
+    return {
+        'date': date_val,
+        'narration': narration,
+        'debit': debit,
+        'credit': credit,
+        'balance': balance,
+    }
+
+
+def iter_transactions_from_csv(file_obj) -> Iterator[Dict]:
+    """
+    Stream transactions out of a CSV export; see _iter_transactions.
+    Parse time (excluding the consumer's work) is recorded as "csv.parse".
+    """
+    return timed_iter("csv.parse", _iter_transactions(file_obj))
+
+
+def _iter_transactions(file_obj) -> Iterator[Dict]:
+    """
+    Stream transactions out of a CSV export without loading it whole.
+
+    Encoding and dialect are sniffed from the first SNIFF_BYTES; the file
+    is then decoded as it is read. Header-mode rows are converted a chunk
+    of CHUNK_ROWS at a time, with the date format inferred once from the
+    first chunk. Preamble rows are skipped until
+    either a header naming at least date and balance columns (parsed by
+    header), or a row starting with a date (parsed positionally).
+    """
+    lines, sample = _open_text(file_obj)
+    if not sample:
+        return
+
+    try:
+        dialect = csv.Sniffer().sniff(sample[:4096], delimiters=",;\t|")
+    except Exception:
+        dialect = csv.excel
+        dialect.delimiter = ','
+
+    columns: Optional[Dict[str, int]] = None
+    positional = False
+    chunk: List[List[str]] = []
+    date_format: Optional[str] = None
+    for row in csv.reader(lines, dialect=dialect):
+        if not row or all((c or '').strip() == '' for c in row):
+            continue
+
+        if columns is None and not positional:
+            columns = _header_map(row)
+            if columns is not None:
+                continue
+            first = (row[0] if len(row) > 0 else '').strip()
+            if not DATE_REGEX.match(first):
+                continue  # preamble
+            positional = True
+
+        if columns is not None:
+            chunk.append(row)
+            if len(chunk) >= CHUNK_ROWS:
+                if date_format is None:
+                    date_format = infer_date_format(_cell(r, columns['date']) for r in chunk)
+                yield from _header_chunk_transactions(chunk, columns, date_format)
+                chunk = []
+        else:
+            txn = _positional_transaction(row)
+            if txn is not None:
+                yield txn
+
+    if chunk:
+        if date_format is None:
+            date_format = infer_date_format(_cell(r, columns['date']) for r in chunk)
+        yield from _header_chunk_transactions(chunk, columns, date_format)
+
+
+def extract_text_from_csv(file_obj) -> List[Dict]:
+    return list(iter_transactions_from_csv(file_obj))
@@ -0,0 +1,142 @@
+"""
+Lightweight per-stage timing for the upload pipeline.
+
+    with span("pdf.text_layer", pages=12):
+        ...
+
+Every span is folded into a process-wide histogram (served at
+/api/metrics) and, inside ``collect_timings()``, appended to a per-request
+breakdown. CPU time is the calling thread's; work done in OCR pool
+processes is reported by the workers themselves via ``record()``.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_request_timings: ContextVar[Optional[List[Dict]]] = ContextVar("request_timings", default=None)
+
+
+class _Stage:
+    def __init__(self):
+        self.count = 0
+        self.wall_sum = 0.0
+        self.cpu_sum = 0.0
+        self.wall_max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.totals: Dict[str, int] = {}
+
+    def observe(self, wall: float, cpu: float, counts: Dict[str, int]):
+        self.count += 1
+        self.wall_sum += wall
+        self.cpu_sum += cpu
+        self.wall_max = max(self.wall_max, wall)
+        self.buckets[bisect_left(BUCKETS, wall)] += 1
+        for key, value in counts.items():
+            self.totals[key] = self.totals.get(key, 0) + value
+
+    def as_dict(self) -> Dict:
+        cumulative, running = {}, 0
+        for bound, hits in zip(BUCKETS + ("+Inf",), self.buckets):
+            running += hits
+            cumulative[str(bound)] = running
+        return {
+            "count": self.count,
+            "wall_seconds_sum": round(self.wall_sum, 6),
+            "cpu_seconds_sum": round(self.cpu_sum, 6),
+            "wall_seconds_max": round(self.wall_max, 6),
+            "wall_seconds_buckets": cumulative,
+            **self.totals,
+        }
+
+
+_stages: Dict[str, _Stage] = {}
+_lock = threading.Lock()
+
+
+def record(name: str, wall: float, cpu: float = 0.0, **counts: int):
+    """
+    Record a finished stage measured elsewhere (e.g. in a pool worker).
+    """
+    with _lock:
+        _stages.setdefault(name, _Stage()).observe(wall, cpu, counts)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append({"stage": name, "wall_s": round(wall, 6), "cpu_s": round(cpu, 6), **counts})
+
+
+class Span:
+    def __init__(self, name: str, counts: Dict[str, int]):
+        self.name = name
+        self.counts = dict(counts)
+
+    def add(self, **counts: int):
+        """
+        Add to the pages/rows processed, for counts only known mid-stage.
+        """
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+
+@contextmanager
+def span(name: str, **counts: int) -> Iterator[Span]:
+    s = Span(name, counts)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield s
+    finally:
+        record(name, time.perf_counter() - wall_start, time.thread_time() - cpu_start, **s.counts)
+
+
+def timed_iter(name: str, iterable: Iterable, count_as: str = "rows") -> Iterator:
+    """
+    Yield from ``iterable``, timing only the work done producing items
+    (not the consumer's work between them). Recorded when exhausted.
+    """
+    wall = cpu = 0.0
+    produced = 0
+    iterator = iter(iterable)
+    try:
+        while True:
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                wall += time.perf_counter() - wall_start
+                cpu += time.thread_time() - cpu_start
+            produced += 1
+            yield item
+    finally:
+        record(name, wall, cpu, **{count_as: produced})
+
+
+@contextmanager
+def collect_timings() -> Iterator[List[Dict]]:
+    """
+    Collect every span finished in this context into the yielded list.
+    """
+    timings: List[Dict] = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def metrics_snapshot() -> Dict:
+    with _lock:
+        return {"stages": {name: stage.as_dict() for name, stage in sorted(_stages.items())}}
+
+
+def reset_metrics():
+    with _lock:
+        _stages.clear()
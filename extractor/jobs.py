@@ -0,0 +1,127 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import ExtractionJob
+from .services import extract_upload, save_transactions
+from .text_parser import detect_account
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor() -> ThreadPoolExecutor:
+    """
+    Return the in-process worker pool that runs extraction jobs.
+    Heavy OCR work is still bounded separately by the shared OCR pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # First job in this process: clear out jobs a previous one died with
+            try:
+                fail_stale_jobs()
+            except Exception:
+                logger.exception("Could not fail stale extraction jobs")
+            workers = getattr(settings, "EXTRACTION_JOB_WORKERS", 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extraction-job")
+        return _executor
+
+
+def submit_job(job: ExtractionJob, path: str, is_csv: bool, content_hash: str, account: str = "", dedup: bool = False):
+    """
+    Queue ``job`` for background extraction. The worker takes ownership of
+    ``path`` and deletes it when done.
+    """
+    _update(job.pk, file_path=path)
+    get_job_executor().submit(run_job, job.pk, path, is_csv, content_hash, account, dedup)
+
+
+def _update(job_id: int, **fields):
+    # QuerySet.update() bypasses auto_now, so stamp updated_at explicitly
+    ExtractionJob.objects.filter(pk=job_id).update(updated_at=timezone.now(), **fields)
+
+
+def _remove(path: str):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except Exception:
+        pass
+
+
+def fail_stale_jobs(job_ids=None) -> int:
+    """
+    Mark queued or running jobs without progress for
+    EXTRACTION_JOB_STALE_AFTER seconds as failed and delete their upload
+    copies. Jobs only run in the process that accepted them, so one caught
+    by a restart or crash would otherwise stay pending forever. Returns the
+    number of jobs failed.
+    """
+    stale_after = getattr(settings, "EXTRACTION_JOB_STALE_AFTER", 3600)
+    stale = ExtractionJob.objects.filter(
+        status__in=[ExtractionJob.STATUS_QUEUED, ExtractionJob.STATUS_RUNNING],
+        updated_at__lt=timezone.now() - timedelta(seconds=stale_after),
+    )
+    if job_ids is not None:
+        stale = stale.filter(pk__in=job_ids)
+    failed = 0
+    for job_id, path in stale.values_list("pk", "file_path"):
+        # Re-checks staleness, so a job that just made progress is left alone
+        if stale.filter(pk=job_id).update(
+            status=ExtractionJob.STATUS_FAILED,
+            error="Interrupted: the worker running this job stopped",
+            file_path="",
+            updated_at=timezone.now(),
+        ):
+            _remove(path)
+            failed += 1
+    return failed
+
+
+def run_job(job_id: int, path: str, is_csv: bool, content_hash: str, account: str = "", dedup: bool = False):
+    close_old_connections()
+    try:
+        # Claim the job; one already failed as stale is not run
+        if not ExtractionJob.objects.filter(pk=job_id, status=ExtractionJob.STATUS_QUEUED).update(
+            status=ExtractionJob.STATUS_RUNNING, updated_at=timezone.now(),
+        ):
+            logger.warning("Extraction job %s is no longer queued; skipping", job_id)
+            return
+
+        def on_page(done: int, total: int):
+            _update(job_id, pages_done=done, pages_total=total)
+
+        job = ExtractionJob.objects.get(pk=job_id)
+        extracted_text, parsed, _ = extract_upload(path, is_csv, content_hash, on_page=on_page)
+        pdf_record, _, _ = save_transactions(
+            job.file_name, parsed, content_hash,
+            account=account or detect_account(extracted_text), dedup=dedup,
+        )
+
+        _update(
+            job_id,
+            status=ExtractionJob.STATUS_SUCCEEDED,
+            upload=pdf_record,
+            file_path="",
+        )
+    except Exception as e:
+        logger.exception("Extraction job %s failed", job_id)
+        _update(
+            job_id,
+            status=ExtractionJob.STATUS_FAILED,
+            error=f"{e.__class__.__name__}: {e}",
+            file_path="",
+        )
+    finally:
+        _remove(path)
+        close_old_connections()
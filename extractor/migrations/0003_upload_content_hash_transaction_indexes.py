@@ -0,0 +1,26 @@
+# Generated by Django 5.0.7 on 2026-10-18 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extractor', '0002_extractionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfupload',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['pdf', 'date'], name='txn_pdf_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['date'], name='txn_date_idx'),
+        ),
+    ]
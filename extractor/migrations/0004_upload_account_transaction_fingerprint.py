@@ -0,0 +1,27 @@
+# Generated by Django 5.0.7 on 2026-10-18 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extractor', '0003_upload_content_hash_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfupload',
+            name='account',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['fingerprint'], name='txn_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.7 on 2026-10-18 05:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extractor', '0004_upload_account_transaction_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('opening_balance', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('closing_balance', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='extractor.pdfupload')),
+            ],
+            options={
+                'ordering': ['upload', 'month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('opening_balance', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('closing_balance', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('first_date', models.DateField(blank=True, null=True)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('upload', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='extractor.pdfupload')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='monthlysummary',
+            constraint=models.UniqueConstraint(fields=('upload', 'month'), name='monthly_summary_upload_month'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-18 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extractor', '0005_upload_and_monthly_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfupload',
+            name='parser_version',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='pdfupload',
+            name='deduplicated',
+            field=models.BooleanField(default=False),
+        ),
+    ]
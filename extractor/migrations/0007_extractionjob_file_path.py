@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extractor', '0006_upload_parser_version_deduplicated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractionjob',
+            name='file_path',
+            field=models.CharField(blank=True, default='', max_length=1024),
+        ),
+    ]
@@ -3,6 +3,16 @@ from django.db import models
 class PDFUpload(models.Model):
     file_name = models.CharField(max_length=255)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # SHA-256 of the uploaded bytes; null for uploads made before it existed
+    content_hash = models.CharField(max_length=64, null=True, blank=True, unique=True)
+    # Account number given with the upload or read from the statement;
+    # transactions are deduplicated within one account
+    account = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    # result_cache.PARSER_VERSION the rows were parsed with; uploads of the
+    # same bytes are re-extracted once it changes
+    parser_version = models.CharField(max_length=16, blank=True, default="")
+    # Whether rows other uploads of the account already had were skipped
+    deduplicated = models.BooleanField(default=False)
 
     def __str__(self):
         return self.file_name
@@ -15,6 +25,82 @@ class Transaction(models.Model):
     debit = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     credit = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     balance = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    # Hash of account, date, amounts and normalized narration
+    # (db.db_handler.transaction_fingerprint); null for rows saved before it
+    fingerprint = models.CharField(max_length=32, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["pdf", "date"], name="txn_pdf_date_idx"),
+            models.Index(fields=["date"], name="txn_date_idx"),
+            models.Index(fields=["fingerprint"], name="txn_fingerprint_idx"),
+        ]
 
     def __str__(self):
         return f"{self.date} - {self.narration[:30]}"
+
+
+class ExtractionJob(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    pages_done = models.PositiveIntegerField(default=0)
+    pages_total = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    upload = models.ForeignKey(PDFUpload, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs")
+    # Upload copy the worker reads; cleared once the job finishes
+    file_path = models.CharField(max_length=1024, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
+
+
+class UploadSummary(models.Model):
+    """
+    Totals for one upload, computed while its transactions are saved.
+    """
+    upload = models.OneToOneField(PDFUpload, on_delete=models.CASCADE, related_name="summary")
+    transaction_count = models.PositiveIntegerField(default=0)
+    debit_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    credit_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    opening_balance = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    closing_balance = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    first_date = models.DateField(null=True, blank=True)
+    last_date = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Summary of {self.upload_id}"
+
+
+class MonthlySummary(models.Model):
+    """
+    Per calendar month rollup of one upload; ``month`` is the 1st of the month.
+    """
+    upload = models.ForeignKey(PDFUpload, on_delete=models.CASCADE, related_name="monthly_summaries")
+    month = models.DateField()
+    transaction_count = models.PositiveIntegerField(default=0)
+    debit_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    credit_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    opening_balance = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    closing_balance = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["upload", "month"], name="monthly_summary_upload_month"),
+        ]
+        ordering = ["upload", "month"]
+
+    def __str__(self):
+        return f"{self.upload_id} {self.month:%Y-%m}"
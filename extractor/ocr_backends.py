@@ -0,0 +1,137 @@
+"""
+OCR engines behind one interface.
+
+    backend = get_ocr_backend()
+    text = backend.image_to_string(img)
+    text, confidence = backend.image_to_text_and_confidence(img)
+
+"tesserocr" binds libtesseract in-process and keeps one initialized
+engine per worker thread, so the language model is loaded once instead of
+once per page. "pytesseract" runs the tesseract CLI per call (temp image
+file, fork, model load). OCR_BACKEND selects one; the default "auto" uses
+tesserocr when it is installed (pip install tesserocr) and pytesseract
+otherwise.
+"""
+import os
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+
+
+class PytesseractBackend:
+    name = "pytesseract"
+
+    def __init__(self, lang: str = OCR_LANG):
+        import pytesseract
+        self.pytesseract = pytesseract
+        self.lang = lang
+
+    def image_to_string(self, img) -> str:
+        return self.pytesseract.image_to_string(img, lang=self.lang)
+
+    def image_to_text_and_confidence(self, img) -> Tuple[str, float]:
+        """
+        Text plus mean word confidence (0-100) from one image_to_data call.
+        The text is rebuilt from the words, with a blank line between
+        paragraphs as image_to_string prints it; a page with no words
+        scores 0.
+        """
+        data = self.pytesseract.image_to_data(img, lang=self.lang, output_type=self.pytesseract.Output.DICT)
+        lines: List[str] = []
+        words: List[str] = []
+        confidences: List[float] = []
+        current = None
+        for i, word in enumerate(data["text"]):
+            line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            if line_key != current:
+                if words:
+                    lines.append(" ".join(words))
+                if current is not None and line_key[:2] != current[:2]:
+                    lines.append("")
+                words, current = [], line_key
+            word = word.strip()
+            if not word:
+                continue
+            words.append(word)
+            conf = float(data["conf"][i])
+            if conf >= 0:
+                confidences.append(conf)
+        if words:
+            lines.append(" ".join(words))
+        text = "\n".join(lines).strip("\n")
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return text, confidence
+
+
+class TesserocrBackend:
+    name = "tesserocr"
+
+    def __init__(self, lang: str = OCR_LANG):
+        import tesserocr
+        self.tesserocr = tesserocr
+        self.lang = lang
+        self._local = threading.local()
+
+    def _api(self):
+        # PyTessBaseAPI is not thread-safe: one warm engine per thread
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = self._local.api = self.tesserocr.PyTessBaseAPI(lang=self.lang)
+        return api
+
+    def _recognize(self, img):
+        api = self._api()
+        if isinstance(img, np.ndarray):
+            img = Image.fromarray(img)
+        api.SetImage(img)
+        api.Recognize()
+        return api
+
+    def image_to_string(self, img) -> str:
+        return self._recognize(img).GetUTF8Text()
+
+    def image_to_text_and_confidence(self, img) -> Tuple[str, float]:
+        api = self._recognize(img)
+        text = api.GetUTF8Text()
+        # MeanTextConf() is 0 when nothing was recognised
+        return text.strip("\n"), float(api.MeanTextConf())
+
+
+BACKENDS = {
+    "pytesseract": PytesseractBackend,
+    "tesserocr": TesserocrBackend,
+}
+
+_backends: Dict[str, object] = {}
+_backends_lock = threading.Lock()
+
+
+def get_ocr_backend(name: Optional[str] = None):
+    """
+    The process-wide instance of backend ``name`` (default OCR_BACKEND).
+    "auto" falls back to pytesseract when tesserocr is not installed.
+    """
+    name = name or OCR_BACKEND
+    with _backends_lock:
+        if name not in _backends:
+            if name == "auto":
+                try:
+                    backend = TesserocrBackend()
+                except ImportError:
+                    backend = PytesseractBackend()
+            elif name in BACKENDS:
+                backend = BACKENDS[name]()
+            else:
+                raise ValueError(f"Unknown OCR backend: {name}")
+            logger.info("Using OCR backend %s", backend.name)
+            _backends[name] = backend
+        return _backends[name]
+
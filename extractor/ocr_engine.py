@@ -0,0 +1,392 @@
+import os
+import pickle
+import hashlib
+import shutil
+import tempfile
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import cv2
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional: pip install pypdfium2
+    pdfium = None
+
+from .instrumentation import record, span
+from .ocr_backends import get_ocr_backend
+from .result_cache import SQLiteCache
+from .table_regions import crop_to_table
+
+logger = logging.getLogger(__name__)
+
+# Process-wide cap on OCR parallelism. Every upload shares the same pool, so
+# concurrent requests queue behind each other instead of each spawning
+# cpu_count() Tesseract processes.
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or (os.cpu_count() or 1)
+
+# Adaptive resolution: OCR every page at OCR_FAST_DPI first and re-render
+# only pages whose mean Tesseract word confidence (0-100) is below
+# OCR_MIN_CONFIDENCE at OCR_MAX_DPI. With OCR_ADAPTIVE=0 every page is
+# rendered once at OCR_MAX_DPI.
+OCR_ADAPTIVE = os.getenv("OCR_ADAPTIVE", "1") not in ("0", "false", "False")
+OCR_FAST_DPI = int(os.getenv("OCR_FAST_DPI", "200"))
+OCR_MAX_DPI = int(os.getenv("OCR_MAX_DPI", "300"))
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "80"))
+
+# Page rasterizer. "pdfium" renders in-process straight into a grayscale
+# array; "pdf2image" runs poppler's pdftoppm per page and reads back an RGB
+# image file. The default "auto" uses pdfium when pypdfium2 is installed.
+PDF_RASTERIZER = os.getenv("PDF_RASTERIZER", "auto")
+
+# OCR only the transaction table found on each page (see table_regions)
+# instead of the whole page. The document's first page keeps everything
+# above its table, where the account number is printed.
+OCR_TABLE_REGIONS = os.getenv("OCR_TABLE_REGIONS", "1") not in ("0", "false", "False")
+
+# Page-level OCR cache shared by all workers and uploads: identical
+# thresholded page pixels (cover sheets, terms pages, re-submitted scans)
+# are OCR'd once. Stored in SQLite, least recently used pages evicted past
+# OCR_CACHE_MAX_MB.
+OCR_CACHE = os.getenv("OCR_CACHE", "1") not in ("0", "false", "False")
+OCR_CACHE_PATH = os.getenv("OCR_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "ocr_pages.sqlite3",
+)
+OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "64"))
+# Bump when preprocessing changes what a cached page's text would be
+OCR_CACHE_VERSION = "1"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# PDFium is not thread-safe, even across documents: serialize every call
+_pdfium_lock = threading.Lock()
+
+_page_cache: Optional[SQLiteCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared OCR process pool, creating it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            logger.info("Starting OCR pool with %d workers", OCR_WORKERS)
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        return _pool
+
+
+def shutdown_ocr_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def _poppler_path() -> Optional[str]:
+    return os.getenv("POPPLER_PATH") or None  # optional on Windows if not in PATH
+
+
+def _use_pdfium() -> bool:
+    if PDF_RASTERIZER == "pdf2image":
+        return False
+    if PDF_RASTERIZER not in ("auto", "pdfium"):
+        raise ValueError(f"Unknown PDF rasterizer: {PDF_RASTERIZER}")
+    if pdfium is None:
+        if PDF_RASTERIZER == "pdfium":
+            raise ImportError("PDF_RASTERIZER=pdfium needs pypdfium2 (pip install pypdfium2)")
+        return False
+    return True
+
+
+@contextmanager
+def _pdf_path(pdf_source) -> Iterator[str]:
+    """
+    A file path for ``pdf_source``. Poppler only reads files, so an
+    in-memory upload is written out once, for the duration of the block.
+    """
+    if isinstance(pdf_source, (str, os.PathLike)):
+        yield pdf_source
+        return
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pdf_source.seek(0)
+            shutil.copyfileobj(pdf_source, f)
+        yield path
+    finally:
+        os.remove(path)
+
+
+@contextmanager
+def _open_pdf(pdf_source):
+    """
+    ``pdf_source`` as the rasterizer reads it: an open PdfDocument with
+    pdfium (streams are read in place), a file path with pdf2image.
+    """
+    if not _use_pdfium():
+        with _pdf_path(pdf_source) as pdf_path:
+            yield pdf_path
+        return
+    if isinstance(pdf_source, pdfium.PdfDocument):
+        yield pdf_source
+        return
+    if not isinstance(pdf_source, (str, os.PathLike)):
+        pdf_source.seek(0)
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(pdf_source)
+    try:
+        yield pdf
+    finally:
+        with _pdfium_lock:
+            pdf.close()
+
+
+def _page_count(pdf) -> int:
+    if pdfium is not None and isinstance(pdf, pdfium.PdfDocument):
+        with _pdfium_lock:
+            return len(pdf)
+    return pdfinfo_from_path(pdf, poppler_path=_poppler_path())["Pages"]
+
+
+def _render_page(pdf, page_number: int, dpi: int) -> List:
+    if pdfium is not None and isinstance(pdf, pdfium.PdfDocument):
+        with _pdfium_lock:
+            page = pdf[page_number - 1]
+            bitmap = page.render(scale=dpi / 72, grayscale=True)
+            # A view of the bitmap's Python-owned buffer, no copy
+            img = bitmap.to_numpy()
+            bitmap.close()
+            page.close()
+        return [img]
+    return convert_from_path(
+        pdf,
+        dpi=dpi,
+        first_page=page_number,
+        last_page=page_number,
+        poppler_path=_poppler_path(),
+    )
+
+
+def iter_page_images(pdf_source, dpi: int = 300, page_numbers: Optional[Iterable[int]] = None) -> Iterator:
+    """
+    Rasterize a PDF one page at a time.
+
+    Each page is rendered on its own, so only the page currently being
+    yielded is held in memory instead of the whole document.
+    ``page_numbers`` (1-based) restricts rendering to those pages.
+    ``pdf_source`` is a path or a seekable binary file object.
+
+    With pdfium pages come out as 2-D uint8 grayscale arrays; with
+    pdf2image as PIL RGB images. preprocess_page() takes either.
+    """
+    with _open_pdf(pdf_source) as pdf:
+        if page_numbers is None:
+            page_numbers = range(1, _page_count(pdf) + 1)
+        for page_number in page_numbers:
+            with span("pdf.rasterize", pages=1):
+                images = _render_page(pdf, page_number, dpi)
+            for img in images:
+                yield img
+
+
+def preprocess_page(img) -> np.ndarray:
+    """
+    Grayscale + fixed threshold, as used for all scanned statements.
+    """
+    if isinstance(img, np.ndarray) and img.ndim == 2:
+        gray = img  # already grayscale (pdfium)
+    else:
+        gray = cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2GRAY)
+    _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
+    return thresh
+
+
+def ocr_region(img, keep_header: bool = True) -> np.ndarray:
+    """
+    The preprocessed pixels of a page that go to Tesseract: its table
+    region (plus what is above it with ``keep_header``), or the whole page
+    with OCR_TABLE_REGIONS off or when no table is found.
+    """
+    thresh = preprocess_page(img)
+    if not OCR_TABLE_REGIONS:
+        return thresh
+    return crop_to_table(thresh, keep_header=keep_header)
+
+
+def get_page_cache() -> Optional[SQLiteCache]:
+    """
+    This process's handle on the OCR page cache, or None when disabled.
+    """
+    global _page_cache
+    if not OCR_CACHE:
+        return None
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = SQLiteCache(OCR_CACHE_PATH, max_bytes=OCR_CACHE_MAX_MB * 1024 * 1024)
+        return _page_cache
+
+
+def page_key(pixels: np.ndarray, mode: str) -> str:
+    """
+    Cache key for OCR'ing these binary pixels: a hash of the bit-packed
+    image and its shape plus everything else that shapes the output (the
+    OCR call, backend and language).
+    """
+    backend = get_ocr_backend()
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(f"{OCR_CACHE_VERSION}|{mode}|{backend.name}|{backend.lang}|{pixels.shape}".encode())
+    hasher.update(np.packbits(pixels > 127).tobytes())
+    return hasher.hexdigest()
+
+
+def _cached_ocr(pixels: np.ndarray, mode: str, run: Callable):
+    cache = get_page_cache()
+    if cache is None:
+        return run(pixels)
+    key = page_key(pixels, mode)
+    try:
+        value = cache.get(key)
+        if value is not None:
+            return pickle.loads(value)
+    except Exception:
+        logger.warning("OCR page cache lookup failed", exc_info=True)
+    result = run(pixels)
+    try:
+        cache.set(key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        logger.warning("OCR page cache store failed", exc_info=True)
+    return result
+
+
+def ocr_page(img, keep_header: bool = True) -> str:
+    """
+    OCR a single rasterized page. Runs inside a pool worker.
+    """
+    return _cached_ocr(ocr_region(img, keep_header), "text", get_ocr_backend().image_to_string)
+
+
+def ocr_page_with_confidence(img, keep_header: bool = True) -> Tuple[str, float]:
+    """
+    OCR a single page and return (text, mean word confidence 0-100).
+    """
+    return _cached_ocr(
+        ocr_region(img, keep_header), "confidence", get_ocr_backend().image_to_text_and_confidence,
+    )
+
+
+def _page_fns(fn: Callable, page_numbers: Iterable[int]) -> List[Callable]:
+    # Only a document's first page keeps its header (account number)
+    return [partial(fn, keep_header=page_number == 1) for page_number in page_numbers]
+
+
+def _timed(fn, img):
+    """
+    fn(img) plus its (wall, cpu) time, measured inside the worker.
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = fn(img)
+    return result, time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+
+def _collect(result):
+    value, wall, cpu = result
+    record("ocr.tesseract", wall, cpu, pages=1)
+    return value
+
+
+def iter_ocr_pages(
+    images: Iterable,
+    workers: Optional[int] = None,
+    fn: Callable = ocr_page,
+    fns: Optional[Iterable[Callable]] = None,
+) -> Iterator:
+    """
+    OCR page images in parallel, yielding fn(img) (by default the page
+    text) in page order. ``fns`` gives one function per image instead.
+
+    ``images`` is consumed lazily: at most ``workers`` pages of this document
+    (never more than the shared pool size) are rendered and in flight at
+    once, so memory stays flat no matter how long the document is. Runs
+    inline when workers == 1.
+    """
+    workers = min(OCR_WORKERS if workers is None else workers, OCR_WORKERS)
+    fns = iter(fns) if fns is not None else repeat(fn)
+
+    if workers <= 1:
+        for img, page_fn in zip(images, fns):
+            yield _collect(_timed(page_fn, img))
+        return
+
+    pool = get_ocr_pool()
+    in_flight = deque()
+    for img, page_fn in zip(images, fns):
+        if len(in_flight) >= workers:
+            yield _collect(in_flight.popleft().result())
+        in_flight.append(pool.submit(_timed, page_fn, img))
+        del img  # the worker has its own pickled copy
+    while in_flight:
+        yield _collect(in_flight.popleft().result())
+
+
+def ocr_pages(images: Iterable, workers: Optional[int] = None) -> List[str]:
+    """
+    OCR page images in parallel and return their text in page order.
+    """
+    return list(iter_ocr_pages(images, workers=workers))
+
+
+def iter_ocr_document(pdf_source, page_numbers: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Render and OCR ``page_numbers`` (1-based, default all) of a PDF,
+    yielding (page_number, text) as each page is final.
+
+    In adaptive mode confident pages are yielded straight from the
+    OCR_FAST_DPI pass; the rest follow once re-rendered at OCR_MAX_DPI
+    (keeping whichever pass read more confidently), so pages may arrive
+    out of order.
+    """
+    with _open_pdf(pdf_source) as pdf:
+        if page_numbers is None:
+            page_numbers = range(1, _page_count(pdf) + 1)
+        page_numbers = list(page_numbers)
+
+        if not OCR_ADAPTIVE or OCR_FAST_DPI >= OCR_MAX_DPI:
+            images = iter_page_images(pdf, dpi=OCR_MAX_DPI, page_numbers=page_numbers)
+            yield from zip(page_numbers, iter_ocr_pages(images, fns=_page_fns(ocr_page, page_numbers)))
+            return
+
+        retry: Dict[int, Tuple[str, float]] = {}
+        images = iter_page_images(pdf, dpi=OCR_FAST_DPI, page_numbers=page_numbers)
+        results = iter_ocr_pages(images, fns=_page_fns(ocr_page_with_confidence, page_numbers))
+        for page_number, (text, confidence) in zip(page_numbers, results):
+            if confidence >= OCR_MIN_CONFIDENCE:
+                yield page_number, text
+            else:
+                retry[page_number] = (text, confidence)
+
+        if retry:
+            logger.info(
+                "Re-rendering %d of %d pages at %d DPI (confidence below %.0f)",
+                len(retry), len(page_numbers), OCR_MAX_DPI, OCR_MIN_CONFIDENCE,
+            )
+            with span("ocr.retry", pages=len(retry)):
+                images = iter_page_images(pdf, dpi=OCR_MAX_DPI, page_numbers=list(retry))
+                results = iter_ocr_pages(images, fns=_page_fns(ocr_page_with_confidence, retry))
+                for page_number, (text, confidence) in zip(list(retry), results):
+                    # Keep the fast pass if the sharper render read worse
+                    fast_text, fast_confidence = retry[page_number]
+                    yield page_number, text if confidence >= fast_confidence else fast_text
@@ -1,6 +1,6 @@
-import pytesseract
 import cv2
 from PIL import Image
+from .ocr_backends import get_ocr_backend
 
 def extract_text_from_image(img_path: str) -> str:
     """
@@ -17,20 +17,17 @@ def extract_text_from_image(img_path: str) -> str:
     _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
 
     # OCR with Tesseract
-    text = pytesseract.image_to_string(thresh, lang="eng")
+    text = get_ocr_backend().image_to_string(thresh)
     return text.strip()
 
 def extract_text_from_scanned_pdf(pdf_path: str) -> str:
     """
     Extracts text from a scanned PDF using OCR on each page.
-    Requires pdf2image to convert PDF pages into images.
+    Uses the same preprocessing and adaptive resolution as the upload
+    path (see ocr_engine.iter_ocr_document); pages are rendered one at a
+    time, so only a few page images are held in memory.
     """
-    from pdf2image import convert_from_path
+    from .ocr_engine import iter_ocr_document
 
-    pages = convert_from_path(pdf_path)
-    text = ""
-
-    for page in pages:
-        text += pytesseract.image_to_string(page, lang="eng") + "\n"
-
-    return text.strip()
+    texts = dict(iter_ocr_document(pdf_path))
+    return "\n".join(texts[n] for n in sorted(texts)).strip()
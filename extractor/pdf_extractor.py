@@ -1,45 +1,106 @@
 import os
-import tempfile
 import logging
-import numpy as np
+from typing import Callable, List, Optional
 import pdfplumber
-import pytesseract
-import cv2
-from pdf2image import convert_from_path
+from .ocr_engine import iter_ocr_document
+from .table_extractor import TableExtractor
+from .instrumentation import span
 
 logger = logging.getLogger(__name__)
 
+# A page is routed to OCR when its text layer has fewer than this many
+# characters and embedded images cover at least this fraction of it.
+OCR_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", "20"))
+OCR_MIN_IMAGE_COVERAGE = float(os.getenv("OCR_MIN_IMAGE_COVERAGE", "0.3"))
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    text = ""
 
-    # --- Step 1: Try pdfplumber (digital PDFs) ---
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text() or ""
-            if page_text:
-                text += page_text + "\n"
+def image_coverage(page) -> float:
+    """
+    Fraction of the page area covered by embedded images (0.0 - 1.0).
+    """
+    page_area = float(page.width * page.height) or 1.0
+    covered = 0.0
+    for img in page.images:
+        width = max(0.0, float(img["x1"] - img["x0"]))
+        height = max(0.0, float(img["bottom"] - img["top"]))
+        covered += width * height
+    return min(covered / page_area, 1.0)
+
+
+def page_needs_ocr(page, page_text: str) -> bool:
+    """
+    Classify a pdfplumber page as scanned: little or no text layer on top
+    of a page-sized image. Blank pages without images are left alone.
+    """
+    if len(page_text.strip()) >= OCR_MIN_PAGE_CHARS:
+        return False
+    return image_coverage(page) >= OCR_MIN_IMAGE_COVERAGE
 
-    if len(text.strip()) > 20:
-        return text
 
-    # --- Step 2: OCR fallback (scanned PDFs) ---
-    logger.info("Falling back to OCR for file: %s", pdf_path)
+def extract_text_from_pdf(
+    pdf_path,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    tables: Optional[TableExtractor] = None,
+) -> str:
+    """
+    Extract text from a PDF, page by page.
+
+    Pages with a usable text layer are read with pdfplumber; only pages that
+    look scanned are rasterized and OCR'd, so a digital statement with a
+    scanned appendix OCRs just the appendix.
+    ``pdf_path`` may also be a seekable binary file object (e.g. an
+    in-memory upload), which is read in place.
+    ``on_page(pages_done, pages_total)`` is called as pages finish.
+    If ``tables`` is given, each page is also fed to it so transactions
+    are read from word positions during the same pass.
+    """
+    # --- Step 1: Read the text layer and classify each page ---
+    page_texts: List[str] = []
+    ocr_page_numbers: List[int] = []
+    text_chars = 0
+    reported: Optional[int] = None
+    with span("pdf.text_layer") as text_span, pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        text_span.add(pages=page_count)
+        for page_number, page in enumerate(pdf.pages, start=1):
+            page_text = page.extract_text() or ""
+            page_texts.append(page_text)
+            text_chars += len(page_text.strip())
+            if page_needs_ocr(page, page_text):
+                ocr_page_numbers.append(page_number)
+                continue
+            if tables is not None:
+                tables.add_page(page_number, page, page_text)
+            # Until the document has some text, the fallback below may
+            # still send every page to OCR, so don't count pages done yet
+            if on_page and text_chars > 20:
+                reported = page_number - len(ocr_page_numbers)
+                on_page(reported, page_count)
+
+    # Nothing recognisable as a scan but no text either: OCR everything,
+    # as the whole-document fallback used to.
+    if not ocr_page_numbers and len("".join(page_texts).strip()) <= 20:
+        ocr_page_numbers = list(range(1, page_count + 1))
 
-    poppler_path = os.getenv("POPPLER_PATH")  # optional on Windows if not in PATH
+    pages_done = page_count - len(ocr_page_numbers)
+    if on_page and pages_done != reported:
+        on_page(pages_done, page_count)
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        images = convert_from_path(
-            pdf_path,
-            dpi=300,
-            output_folder=temp_dir,
-            poppler_path=poppler_path if poppler_path else None,
+    # --- Step 2: OCR only the pages that need it ---
+    if ocr_page_numbers:
+        logger.info(
+            "OCR for %d of %d pages in file: %s",
+            len(ocr_page_numbers), page_count, getattr(pdf_path, 'name', pdf_path),
         )
 
-        for i, img in enumerate(images):
-            img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-            gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-            _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
-            text += pytesseract.image_to_string(thresh, lang="eng") + "\n"
+        # Pages are rendered and OCR'd as a stream, one page per worker at a time
+        with span("pdf.ocr", pages=len(ocr_page_numbers)):
+            for page_number, page_text in iter_ocr_document(pdf_path, ocr_page_numbers):
+                page_texts[page_number - 1] = page_text
+                if tables is not None:
+                    tables.add_text(page_number, page_text)
+                pages_done += 1
+                if on_page:
+                    on_page(pages_done, page_count)
 
-    return text
+    return "".join(page_text + "\n" for page_text in page_texts if page_text)
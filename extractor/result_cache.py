@@ -0,0 +1,210 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever extraction or parsing output changes, so stale results
+# cached by an older parser are never served.
+PARSER_VERSION = "4"
+
+
+class MemoryLRUCache:
+    """
+    In-process LRU cache bounded by the total size of the stored values.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._data[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class SQLiteCache:
+    """
+    On-disk cache in a local SQLite file, evicting least recently used
+    entries once the stored values exceed ``max_bytes``.
+
+    A hit only rewrites the entry's access time if it is older than
+    ``touch_interval`` seconds, so hot entries are read without taking the
+    write lock that every process sharing the file contends for.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, touch_interval: float = 60.0):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            # Readers don't block on (or block) the writer; persists in the file
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+            # Running total of the stored sizes, kept by triggers so every
+            # process sharing the file sees the same figure without a SUM()
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_size (total INTEGER NOT NULL)")
+            conn.execute(
+                "INSERT INTO cache_size (total) SELECT COALESCE(SUM(size), 0) FROM cache"
+                " WHERE NOT EXISTS (SELECT 1 FROM cache_size)"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_size_insert AFTER INSERT ON cache"
+                " BEGIN UPDATE cache_size SET total = total + NEW.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_size_update AFTER UPDATE OF size ON cache"
+                " BEGIN UPDATE cache_size SET total = total + NEW.size - OLD.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_size_delete AFTER DELETE ON cache"
+                " BEGIN UPDATE cache_size SET total = total - OLD.size; END"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, accessed FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > self.touch_interval:
+                conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._connect() as conn:
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit
+            # delete doesn't fire the size trigger
+            conn.execute(
+                "INSERT INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET"
+                " value = excluded.value, size = excluded.size, accessed = excluded.accessed",
+                (key, sqlite3.Binary(value), len(value), time.time()),
+            )
+            excess = conn.execute("SELECT total FROM cache_size").fetchone()[0] - self.max_bytes
+            if excess <= 0:
+                return
+            # Walk the accessed index only as far as needed to free ``excess``
+            stale = []
+            for old_key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed"):
+                stale.append((old_key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM cache WHERE key = ?", stale)
+
+
+class TieredCache:
+    """
+    Checks each backend in order; a hit in a slower tier is copied into the
+    faster tiers ahead of it.
+    """
+
+    def __init__(self, backends: List):
+        self.backends = backends
+
+    def get(self, key: str) -> Optional[bytes]:
+        for i, backend in enumerate(self.backends):
+            value = backend.get(key)
+            if value is not None:
+                for faster in self.backends[:i]:
+                    faster.set(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: bytes):
+        for backend in self.backends:
+            backend.set(key, value)
+
+
+BACKENDS = {
+    "memory": MemoryLRUCache,
+    "sqlite": SQLiteCache,
+}
+
+_cache: Optional[TieredCache] = None
+_cache_lock = threading.Lock()
+
+
+def _build_cache() -> TieredCache:
+    config = getattr(settings, "EXTRACTION_CACHE", {})
+    backends = []
+    for spec in config.get("BACKENDS", ["memory"]):
+        name = spec if isinstance(spec, str) else spec["BACKEND"]
+        options = {} if isinstance(spec, str) else spec.get("OPTIONS", {})
+        backend_cls = BACKENDS[name] if name in BACKENDS else import_string(name)
+        backends.append(backend_cls(**options))
+    return TieredCache(backends)
+
+
+def get_result_cache() -> TieredCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = _build_cache()
+        return _cache
+
+
+def result_key(content_hash: str) -> str:
+    return f"{content_hash}:{PARSER_VERSION}"
+
+
+def load_result(content_hash: str) -> Optional[Tuple[str, List[Dict]]]:
+    """
+    Return the cached (extracted_text, parsed_transactions) for an upload, if any.
+    """
+    try:
+        value = get_result_cache().get(result_key(content_hash))
+        if value is None:
+            return None
+        return pickle.loads(value)
+    except Exception:
+        logger.warning("Extraction cache lookup failed", exc_info=True)
+        return None
+
+
+def store_result(content_hash: str, extracted_text: str, parsed: List[Dict]):
+    try:
+        value = pickle.dumps((extracted_text, parsed), protocol=pickle.HIGHEST_PROTOCOL)
+        get_result_cache().set(result_key(content_hash), value)
+    except Exception:
+        logger.warning("Extraction cache store failed", exc_info=True)
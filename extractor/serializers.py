@@ -1,9 +1,12 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Transaction
+from .models import ExtractionJob, Transaction
 import os
 
 class PDFUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
+    # Optional; read from the statement text when not given
+    account = serializers.CharField(max_length=64, required=False, allow_blank=True, default="")
 
     def validate_file(self, value):
         max_size_mb = 25
@@ -28,3 +31,19 @@ class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = ["date", "narration", "debit", "credit", "balance"]
+
+class ExtractionJobSerializer(serializers.ModelSerializer):
+    upload_id = serializers.IntegerField(read_only=True)
+    transactions_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExtractionJob
+        fields = ["id", "file_name", "status", "pages_done", "pages_total", "error",
+                  "upload_id", "created_at", "updated_at", "transactions_url"]
+
+    def get_transactions_url(self, job):
+        if job.status != ExtractionJob.STATUS_SUCCEEDED or job.upload_id is None:
+            return None
+        url = reverse('upload-transactions', args=[job.upload_id])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,196 @@
+import logging
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from db.db_handler import SummaryAccumulator, bulk_insert_transactions, upload_by_hash
+
+from .csv_extractor import iter_transactions_from_csv
+from .models import PDFUpload
+from .pdf_extractor import extract_text_from_pdf
+from .result_cache import PARSER_VERSION, load_result, store_result
+from .table_extractor import TableExtractor
+from .text_parser import parse_bank_statement
+
+logger = logging.getLogger(__name__)
+
+# Streamed CSV results with more rows than this are not kept in the
+# result cache, so caching never undoes the streaming memory bound.
+CACHE_MAX_ROWS = 50_000
+
+# Rows per on_rows() call for sources without pages (CSV)
+STREAM_CHUNK_ROWS = 500
+
+
+UploadSource = Union[str, BinaryIO]
+
+
+def _iter_csv(source: UploadSource) -> Iterator[Dict]:
+    # Parse errors propagate: rows already yielded are only part of the
+    # file, and save_transactions rolls them back rather than keep them
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            yield from iter_transactions_from_csv(f)
+    else:
+        source.seek(0)
+        yield from iter_transactions_from_csv(source)
+
+
+def _cache_when_done(content_hash: str, extracted_text: str, rows: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Pass rows through, storing them in the result cache once exhausted.
+    Nothing is stored if ``rows`` raises or the consumer stops early.
+    """
+    buffered: Optional[List[Dict]] = []
+    for row in rows:
+        if buffered is not None:
+            buffered.append(row)
+            if len(buffered) > CACHE_MAX_ROWS:
+                buffered = None
+        yield row
+    if buffered is not None:
+        store_result(content_hash, extracted_text, buffered)
+
+
+def _emit_chunks(rows: Iterable[Dict], on_rows: Callable[[Optional[int], List[Dict]], None]) -> Iterator[Dict]:
+    """
+    Pass rows through, handing them to ``on_rows`` in STREAM_CHUNK_ROWS
+    chunks as they are consumed.
+    """
+    chunk: List[Dict] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= STREAM_CHUNK_ROWS:
+            on_rows(None, chunk)
+            chunk = []
+        yield row
+    if chunk:
+        on_rows(None, chunk)
+
+
+def extract_upload(
+    source: UploadSource,
+    is_csv: bool,
+    content_hash: str,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    on_rows: Optional[Callable[[Optional[int], List[Dict]], None]] = None,
+) -> Tuple[str, Iterable[Dict], bool]:
+    """
+    Extract and parse an uploaded statement. ``source`` is a file path or a
+    seekable binary file object (such as Django's in-memory upload), which
+    is read in place rather than copied.
+    Returns (extracted_text, parsed_transactions, served_from_cache).
+
+    CSV transactions are returned as a generator that reads ``source`` as it
+    is consumed, so the file must outlive the iteration.
+
+    ``on_rows(page_number, rows)`` receives every parsed row exactly once,
+    as early as it is known: per page for table-mode PDFs, in chunks as
+    the generator is consumed for CSVs (page_number None), or all at once.
+    """
+    cached = load_result(content_hash)
+    if cached is not None:
+        extracted_text, parsed = cached
+        if on_rows:
+            on_rows(None, parsed)
+        return extracted_text, parsed, True
+
+    if is_csv:
+        extracted_text = "CSV Upload"
+        parsed = _cache_when_done(content_hash, extracted_text, _iter_csv(source))
+        if on_rows:
+            parsed = _emit_chunks(parsed, on_rows)
+        return extracted_text, parsed, False
+
+    if not isinstance(source, str):
+        source.seek(0)
+
+    if getattr(settings, 'EXTRACTION_TABLE_MODE', True):
+        # Rows come straight from word positions; no regex pass over the text
+        tables = TableExtractor(on_rows=on_rows)
+        extracted_text = extract_text_from_pdf(source, on_page=on_page, tables=tables)
+        parsed = tables.rows
+    else:
+        extracted_text = extract_text_from_pdf(source, on_page=on_page)
+        try:
+            parsed = parse_bank_statement(extracted_text)
+        except Exception:
+            parsed = []
+        if on_rows:
+            on_rows(None, parsed)
+
+    store_result(content_hash, extracted_text, parsed)
+    return extracted_text, parsed, False
+
+
+def reusable_upload(content_hash: str, account: str = "", dedup: bool = False) -> Optional[PDFUpload]:
+    """
+    The earlier upload of these exact bytes, if it can be served as is:
+    parsed with the current PARSER_VERSION, saved under ``account`` (when
+    one is given) and deduplicated if ``dedup`` is asked for. Otherwise the
+    bytes are extracted again and save_transactions replaces its rows.
+    """
+    existing = upload_by_hash(content_hash)
+    if existing is None or existing.parser_version != PARSER_VERSION:
+        return None
+    if account and existing.account != account:
+        return None
+    if dedup and existing.account and not existing.deduplicated:
+        return None
+    return existing
+
+
+def save_transactions(
+    file_name: str,
+    parsed: Iterable[Dict],
+    content_hash: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    account: str = "",
+    dedup: bool = False,
+) -> Tuple[PDFUpload, int, int]:
+    """
+    Create the PDFUpload record and its transactions in one DB transaction.
+    ``parsed`` may be a generator; rows are inserted in batches as they arrive.
+    With ``dedup``, rows the same ``account`` already has from earlier
+    uploads (overlapping statement periods) are skipped; uploads without
+    an account are never deduplicated. Upload and monthly
+    summaries are stored alongside, from the rows actually saved.
+    Returns (pdf_record, transactions_saved, duplicates_skipped).
+
+    An upload already stored for ``content_hash`` (older parser, other
+    account) keeps its id and has its rows replaced. If a concurrent
+    request created it in the meantime, that upload is returned with
+    nothing saved.
+    """
+    fields = {
+        "file_name": file_name,
+        "account": account,
+        "parser_version": PARSER_VERSION,
+        "deduplicated": dedup and bool(account),
+    }
+    try:
+        with transaction.atomic():
+            pdf_record = None
+            if content_hash:
+                pdf_record = PDFUpload.objects.select_for_update().filter(content_hash=content_hash).first()
+            if pdf_record is None:
+                pdf_record = PDFUpload.objects.create(content_hash=content_hash, **fields)
+            else:
+                logger.info("Re-extracted upload #%s, replacing its transactions", pdf_record.pk)
+                pdf_record.transactions.all().delete()
+                for name, value in fields.items():
+                    setattr(pdf_record, name, value)
+                pdf_record.save(update_fields=list(fields))
+            summary = SummaryAccumulator()
+            saved, skipped = bulk_insert_transactions(
+                pdf_record.pk, parsed, batch_size, account=account, dedup=dedup, summary=summary,
+            )
+            summary.store(pdf_record.pk)
+        return pdf_record, saved, skipped
+    except IntegrityError:
+        existing = upload_by_hash(content_hash) if content_hash else None
+        if existing is None:
+            raise
+        logger.info("Upload %s was already saved as #%s", content_hash, existing.pk)
+        return existing, 0, 0
@@ -0,0 +1,221 @@
+"""
+Streaming upload endpoint: progress and parsed transactions are sent while
+the statement is still being extracted, as NDJSON (default) or
+server-sent events (?as=sse or Accept: text/event-stream).
+
+Every message is a JSON object with an "event" key:
+
+    {"event": "progress", "pages_done": 3, "pages_total": 60}
+    {"event": "rows", "page": 3, "transactions": [...]}    # page null for CSV
+    {"event": "done", "upload_id": ..., "transaction_count": ..., ...}
+    {"event": "error", "error": ..., "error_type": ...}
+
+Extraction and the insert run on the async upload pool. The worker owns
+its copy of the upload, so a client that disconnects early still gets
+the full result saved.
+"""
+import os
+import queue
+import hashlib
+import logging
+import threading
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .async_views import get_upload_executor
+from .models import Transaction
+from .serializers import PDFUploadSerializer
+from .services import STREAM_CHUNK_ROWS, extract_upload, reusable_upload, save_transactions
+from .text_parser import detect_account
+from .views import dedup_requested, detach_upload, error_body, is_csv_upload, upload_body
+
+logger = logging.getLogger(__name__)
+
+# Seconds without an event before a keep-alive is sent (long OCR pages)
+HEARTBEAT_SECONDS = 15
+# Events buffered ahead of the client; a worker that gets further ahead
+# waits, so a slow reader doesn't pull the whole statement into memory
+EVENT_BUFFER = 16
+
+ROW_FIELDS = ["date", "narration", "debit", "credit", "balance"]
+
+_DONE = object()
+
+
+def _amount(value):
+    # Render like TransactionSerializer does for saved rows: "12.50" or null
+    return f"{Decimal(str(value)):.2f}" if value not in (None, 0, 0.0, "") else None
+
+
+def _rows_event(page, rows) -> dict:
+    return {
+        "event": "rows",
+        "page": page,
+        "transactions": [
+            {
+                "date": row["date"],
+                "narration": row["narration"],
+                "debit": _amount(row.get("debit")),
+                "credit": _amount(row.get("credit")),
+                "balance": _amount(row.get("balance")),
+            }
+            for row in rows
+        ],
+    }
+
+
+class _EventChannel:
+    """
+    Bounded hand-off from the worker to the response. Once the response is
+    closed (client gone) events are dropped instead of blocking the worker,
+    which still finishes saving the upload.
+    """
+
+    def __init__(self, maxsize: int = EVENT_BUFFER):
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.closed = threading.Event()
+
+    def put(self, event):
+        while not self.closed.is_set():
+            try:
+                self.queue.put(event, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+
+def _run(events: _EventChannel, path: str, file_name: str, is_csv: bool, content_hash: str,
+         account: str, dedup: bool, links):
+    close_old_connections()
+    try:
+        def on_page(done: int, total: int):
+            events.put({"event": "progress", "pages_done": done, "pages_total": total})
+
+        def on_rows(page, rows):
+            if rows:
+                events.put(_rows_event(page, rows))
+
+        extracted_text, parsed, cached = extract_upload(
+            path, is_csv, content_hash, on_page=on_page, on_rows=on_rows,
+        )
+        pdf_record, saved, skipped = save_transactions(
+            file_name, parsed, content_hash,
+            account=account or detect_account(extracted_text), dedup=dedup,
+        )
+        events.put({"event": "done", **links(pdf_record, saved, cached, skipped)})
+    except Exception as e:
+        logger.exception("Failed processing streamed upload")
+        events.put({"event": "error", **error_body(e)})
+    finally:
+        events.put(_DONE)
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
+        close_old_connections()
+
+
+def _iter_events(events: _EventChannel):
+    try:
+        while True:
+            try:
+                event = events.queue.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield None
+                continue
+            if event is _DONE:
+                return
+            yield event
+    finally:
+        events.closed.set()
+
+
+def _iter_saved(request, upload):
+    # Duplicate upload: replay the stored rows, then finish
+    rows = (
+        Transaction.objects.filter(pdf=upload)
+        .order_by('id')
+        .values(*ROW_FIELDS)
+        .iterator(chunk_size=STREAM_CHUNK_ROWS)
+    )
+    chunk = []
+    count = 0
+    for row in rows:
+        chunk.append(row)
+        count += 1
+        if len(chunk) >= STREAM_CHUNK_ROWS:
+            yield _rows_event(None, chunk)
+            chunk = []
+    if chunk:
+        yield _rows_event(None, chunk)
+    yield {"event": "done", **upload_body(request, upload, count, cached=True, duplicate=True)}
+
+
+def _encode(events, sse: bool):
+    encoder = DjangoJSONEncoder()
+    try:
+        for event in events:
+            if event is None:
+                yield ": keep-alive\n\n" if sse else "{\"event\": \"heartbeat\"}\n"
+            elif sse:
+                yield f"event: {event['event']}\ndata: {encoder.encode(event)}\n\n"
+            else:
+                yield encoder.encode(event) + "\n"
+    finally:
+        # Response closed (possibly early): let the worker stop waiting on us
+        events.close()
+
+
+@csrf_exempt
+@require_POST
+def upload_stream(request):
+    """
+    Upload a statement and stream its progress and transactions back.
+    Accepts the same form fields and ?dedup as the upload endpoint.
+    """
+    data = request.POST.dict()
+    if 'file' in request.FILES:
+        data['file'] = request.FILES['file']
+    serializer = PDFUploadSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    uploaded_file = serializer.validated_data['file']
+    account = serializer.validated_data['account'].strip()
+    dedup = dedup_requested(request.GET.get('dedup') or request.POST.get('dedup'))
+    is_csv = is_csv_upload(uploaded_file)
+    sse = request.GET.get('as') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+
+    hasher = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        hasher.update(chunk)
+    content_hash = hasher.hexdigest()
+
+    existing = reusable_upload(content_hash, account, dedup)
+    if existing is not None:
+        events = _iter_saved(request, existing)
+    else:
+        def links(pdf_record, saved, cached, skipped):
+            return upload_body(request, pdf_record, saved, cached, skipped=skipped)
+
+        channel = _EventChannel()
+        path = detach_upload(uploaded_file, '.csv' if is_csv else '.pdf')
+        get_upload_executor().submit(
+            _run, channel, path, getattr(uploaded_file, 'name', 'uploaded.pdf'),
+            is_csv, content_hash, account, dedup, links,
+        )
+        events = _iter_events(channel)
+
+    response = StreamingHttpResponse(
+        _encode(events, sse),
+        content_type='text/event-stream' if sse else 'application/x-ndjson',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx hold events back
+    return response
@@ -0,0 +1,251 @@
+import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .text_parser import parse_bank_statement
+
+# Header words that identify each statement column. Words that match none
+# of these (e.g. "Txn", "Amt", "No") are ignored when locating columns.
+HEADER_WORDS = {
+    'date': 'date', 'dt': 'date',
+    'narration': 'narration', 'description': 'narration', 'particulars': 'narration',
+    'details': 'narration', 'remarks': 'narration',
+    'chq': 'ref', 'cheque': 'ref', 'ref': 'ref',
+    'debit': 'debit', 'debits': 'debit', 'withdrawal': 'debit', 'withdrawals': 'debit', 'dr': 'debit',
+    'credit': 'credit', 'credits': 'credit', 'deposit': 'credit', 'deposits': 'credit', 'cr': 'credit',
+    'balance': 'balance',
+}
+
+DATE_FORMATS = ['%d-%m-%Y', '%d/%m/%Y', '%d-%b-%Y', '%d %b %Y', '%d-%m-%y', '%d/%m/%y', '%Y-%m-%d']
+AMOUNT_RE = re.compile(r'^(-?[\d,]+(?:\.\d+)?)\s*(CR|Cr|DR|Dr)?$')
+TOKEN_RE = re.compile(r'[a-z]+')
+
+LINE_TOLERANCE = 3.0  # points; words whose tops differ by less share a line
+MAX_CACHED_LAYOUTS = 64
+
+
+class ColumnLayout:
+    """
+    Column kinds in left-to-right order plus the x positions separating them.
+    """
+
+    def __init__(self, kinds: List[str], boundaries: List[float]):
+        self.kinds = kinds
+        self.boundaries = boundaries
+
+    def column_of(self, word: Dict) -> str:
+        center = (word['x0'] + word['x1']) / 2
+        return self.kinds[bisect_right(self.boundaries, center)]
+
+
+# Layouts detected so far, keyed by header signature, shared across
+# documents so statements from the same bank skip boundary detection.
+_layout_cache: "OrderedDict[Tuple, ColumnLayout]" = OrderedDict()
+_layout_lock = threading.Lock()
+
+
+def _parse_date(s: str):
+    s = s.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(s: str) -> Optional[float]:
+    m = AMOUNT_RE.match(s.strip())
+    if not m:
+        return None
+    try:
+        value = float(m.group(1).replace(',', ''))
+    except ValueError:
+        return None
+    # "1,234.00 Dr" is an overdrawn (negative) balance
+    if m.group(2) and m.group(2).upper() == 'DR':
+        return -abs(value)
+    return value
+
+
+def _group_lines(words: List[Dict]) -> List[List[Dict]]:
+    lines: List[List[Dict]] = []
+    for word in sorted(words, key=lambda w: (round(w['top']), w['x0'])):
+        if lines and abs(word['top'] - lines[-1][0]['top']) <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    for line in lines:
+        line.sort(key=lambda w: w['x0'])
+    return lines
+
+
+def _header_columns(line: List[Dict]) -> Optional[List[Tuple[str, float, float]]]:
+    """
+    Return [(kind, x0, x1), ...] if ``line`` looks like a statement header.
+    """
+    columns: List[Tuple[str, float, float]] = []
+    seen = set()
+    for word in line:
+        kind = None
+        for token in TOKEN_RE.findall(word['text'].lower()):
+            if token in HEADER_WORDS:
+                kind = HEADER_WORDS[token]
+                break
+        if kind is None:
+            continue
+        if kind in seen:
+            # e.g. "Value Date" after "Txn Date": keep it as an ignored column
+            kind = 'ignore' if kind == 'date' else kind
+            if columns and columns[-1][0] == kind:
+                _, x0, _ = columns[-1]
+                columns[-1] = (kind, x0, word['x1'])
+                continue
+        seen.add(kind)
+        columns.append((kind, word['x0'], word['x1']))
+    if 'date' in seen and 'balance' in seen:
+        return columns
+    return None
+
+
+def _detect_boundaries(columns: List[Tuple[str, float, float]], data_lines: List[List[Dict]]) -> List[float]:
+    """
+    Place each column separator on the emptiest vertical strip between two
+    header labels, measured over the data rows (a whitespace "river").
+    """
+    coverage: Dict[int, int] = {}
+    for line in data_lines:
+        for word in line:
+            for x in range(int(word['x0']), int(word['x1']) + 1):
+                coverage[x] = coverage.get(x, 0) + 1
+
+    boundaries = []
+    for (_, left_x0, left_x1), (_, right_x0, right_x1) in zip(columns, columns[1:]):
+        lo = int((left_x0 + left_x1) / 2)
+        hi = int((right_x0 + right_x1) / 2)
+        midpoint = (left_x1 + right_x0) / 2
+        if hi <= lo:
+            boundaries.append(midpoint)
+            continue
+        best = min(range(lo, hi + 1), key=lambda x: (coverage.get(x, 0), abs(x - midpoint)))
+        boundaries.append(float(best))
+    return boundaries
+
+
+def _layout_signature(page, columns: List[Tuple[str, float, float]]) -> Tuple:
+    return (
+        round(float(page.width)),
+        tuple((kind, round(x0 / 5)) for kind, x0, _ in columns),
+    )
+
+
+def _cached_layout(signature: Tuple) -> Optional[ColumnLayout]:
+    with _layout_lock:
+        layout = _layout_cache.get(signature)
+        if layout is not None:
+            _layout_cache.move_to_end(signature)
+        return layout
+
+
+def _store_layout(signature: Tuple, layout: ColumnLayout):
+    with _layout_lock:
+        _layout_cache[signature] = layout
+        while len(_layout_cache) > MAX_CACHED_LAYOUTS:
+            _layout_cache.popitem(last=False)
+
+
+class TableExtractor:
+    """
+    Builds transactions directly from word positions, one page at a time.
+
+    The column layout found on the first header row is reused for every
+    following page of the document, and cached by header signature for
+    later documents. Pages without a recognisable table (and OCR'd pages,
+    which have no word positions) fall back to parse_bank_statement.
+    ``on_rows(page_number, rows)`` is called as each page's rows are ready.
+    """
+
+    def __init__(self, on_rows: Optional[Callable[[int, List[Dict]], None]] = None):
+        self.layout: Optional[ColumnLayout] = None
+        self.on_rows = on_rows
+        self._page_rows: Dict[int, List[Dict]] = {}
+
+    def _set_rows(self, page_number: int, rows: List[Dict]):
+        self._page_rows[page_number] = rows
+        if self.on_rows is not None:
+            self.on_rows(page_number, rows)
+
+    @property
+    def rows(self) -> List[Dict]:
+        return [row for page_number in sorted(self._page_rows) for row in self._page_rows[page_number]]
+
+    def add_text(self, page_number: int, page_text: str):
+        try:
+            rows = parse_bank_statement(page_text)
+        except Exception:
+            rows = []
+        self._set_rows(page_number, rows)
+
+    def add_page(self, page_number: int, page, page_text: str):
+        lines = _group_lines(page.extract_words())
+        data_lines = lines
+        for i, line in enumerate(lines):
+            columns = _header_columns(line)
+            if columns is None:
+                continue
+            data_lines = lines[i + 1:]
+            signature = _layout_signature(page, columns)
+            layout = _cached_layout(signature)
+            if layout is None:
+                layout = ColumnLayout(
+                    [kind for kind, _, _ in columns],
+                    _detect_boundaries(columns, data_lines),
+                )
+                _store_layout(signature, layout)
+            self.layout = layout
+            break
+
+        if self.layout is None:
+            self.add_text(page_number, page_text)
+            return
+        self._set_rows(page_number, self._rows_from_lines(data_lines))
+
+    def _rows_from_lines(self, lines: List[List[Dict]]) -> List[Dict]:
+        rows: List[Dict] = []
+        last_bottom = None
+        for line in lines:
+            cells: Dict[str, List[str]] = {}
+            for word in line:
+                cells.setdefault(self.layout.column_of(word), []).append(word['text'])
+            text = {kind: ' '.join(parts) for kind, parts in cells.items()}
+
+            line_top = min(w['top'] for w in line)
+            line_bottom = max(w['bottom'] for w in line)
+            date_val = _parse_date(text.get('date', ''))
+
+            if date_val is not None:
+                balance = _parse_amount(text.get('balance', ''))
+                if balance is None:
+                    last_bottom = None
+                    continue
+                rows.append({
+                    'date': date_val,
+                    'narration': text.get('narration', '').strip(),
+                    'debit': abs(_parse_amount(text.get('debit', '')) or 0.0),
+                    'credit': abs(_parse_amount(text.get('credit', '')) or 0.0),
+                    'balance': balance,
+                })
+                last_bottom = line_bottom
+            elif rows and last_bottom is not None and text.get('narration') and set(text) == {'narration'}:
+                # Wrapped narration directly under its row
+                if line_top - last_bottom <= (line_bottom - line_top) * 1.5:
+                    rows[-1]['narration'] = f"{rows[-1]['narration']} {text['narration']}".strip()
+                    last_bottom = line_bottom
+                else:
+                    last_bottom = None
+            else:
+                last_bottom = None
+        return rows
@@ -0,0 +1,167 @@
+"""
+Find the transaction table on a thresholded page image, so Tesseract can
+skip the logos, address blocks, footers and legal text around it.
+
+    region = find_table_region(binary)   # (x0, y0, x1, y1) or None
+    binary = crop_to_table(binary)
+
+Unruled tables are found from their text lines: a transaction row splits
+into three or more cells separated by wide gaps (date, narration,
+amounts), while prose and address lines don't. A page with a block of at
+least TABLE_MIN_ROWS such lines has a table; the region then spans every
+block from the first to the last, plus the label + amount lines
+(opening/closing balance) next to them. Grid lines of ruled tables widen
+it. When no table is found the page is left whole.
+"""
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Fewest table-like lines that make a table
+TABLE_MIN_ROWS = 3
+# Non-table lines allowed inside a table (wrapped narrations, subtotals)
+TABLE_MAX_GAP_LINES = 2
+# A gap wider than this many line heights separates two cells
+CELL_GAP_LINES = 1.5
+# Downscale factor for finding table rules
+RULE_SCALE = 4
+
+Region = Tuple[int, int, int, int]
+
+
+def _runs(mask: np.ndarray, min_gap: int = 1) -> List[Tuple[int, int]]:
+    """
+    [start, end) of the True runs in a 1-D mask, merging runs separated by
+    fewer than ``min_gap`` False entries.
+    """
+    idx = np.flatnonzero(mask)
+    if not idx.size:
+        return []
+    breaks = np.flatnonzero(np.diff(idx) > min_gap)
+    starts = np.concatenate(([idx[0]], idx[breaks + 1]))
+    ends = np.concatenate((idx[breaks], [idx[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def _rules(ink: np.ndarray) -> Tuple[np.ndarray, Optional[Region]]:
+    """
+    Mask of long horizontal and vertical rules, and the box around the
+    vertical ones when there are at least two (a ruled table).
+    """
+    # Long-kernel morphology is slow at scan resolution; rules survive a
+    # RULE_SCALE max-pool, at worst a few pixels thicker
+    block = cv2.getStructuringElement(cv2.MORPH_RECT, (RULE_SCALE, RULE_SCALE))
+    small = cv2.dilate(ink, block)[::RULE_SCALE, ::RULE_SCALE]
+    sh, sw = small.shape
+    horizontal = cv2.morphologyEx(small, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (max(sw // 4, 1), 1)))
+    vertical = cv2.morphologyEx(small, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(sh // 20, 1))))
+    h, w = ink.shape
+    rules = cv2.resize(cv2.bitwise_or(horizontal, vertical), (sw * RULE_SCALE, sh * RULE_SCALE),
+                       interpolation=cv2.INTER_NEAREST)[:h, :w]
+    # Cover the rules' edges too, or they read as ink on every text row
+    rules = cv2.dilate(rules, block)
+    columns = _runs(vertical.any(axis=0))
+    if len(columns) < 2:
+        return rules, None
+    ys = np.flatnonzero(vertical.any(axis=1))
+    return rules, (
+        columns[0][0] * RULE_SCALE, int(ys[0]) * RULE_SCALE,
+        columns[-1][1] * RULE_SCALE, (int(ys[-1]) + 1) * RULE_SCALE,
+    )
+
+
+def _table_blocks(cells: List[List[Tuple[int, int]]]) -> List[Tuple[int, int, int]]:
+    """
+    (first line, last line, table-like lines) of each run of lines with
+    three or more cells, tolerating TABLE_MAX_GAP_LINES other lines inside.
+    """
+    blocks = []
+    start = last = None
+    count = misses = 0
+    for i, line_cells in enumerate(cells):
+        if len(line_cells) >= 3:
+            if start is None:
+                start, count = i, 0
+            last, count, misses = i, count + 1, 0
+        elif start is not None:
+            misses += 1
+            if misses > TABLE_MAX_GAP_LINES:
+                blocks.append((start, last, count))
+                start = None
+    if start is not None:
+        blocks.append((start, last, count))
+    return blocks
+
+
+def _extend(cells: List[List[Tuple[int, int]]], edge: int, step: int) -> int:
+    """
+    Move ``edge`` past neighbouring lines of two or more cells (a label and
+    an amount), so balance lines just outside the table stay in the crop.
+    """
+    i = edge + step
+    while 0 <= i < len(cells) and len(cells[i]) >= 2:
+        edge, i = i, i + step
+    return edge
+
+
+def find_table_region(binary: np.ndarray) -> Optional[Region]:
+    """
+    Bounding box (x0, y0, x1, y1) of the transaction table on a thresholded
+    page (black text on white), or None if the page has no clear table.
+    """
+    # Speckle-free ink mask for the analysis only; OCR still gets ``binary``
+    ink = (cv2.medianBlur(binary, 3) < 128).astype(np.uint8) * 255
+    rules, ruled = _rules(ink)
+    ink = cv2.bitwise_and(ink, cv2.bitwise_not(rules)) > 0
+
+    h, w = ink.shape
+    lines = [
+        (top, bottom)
+        for top, bottom in _runs(ink.sum(axis=1) > max(2, w // 200))
+        if bottom - top >= max(3, h // 500)
+    ]
+    if len(lines) < TABLE_MIN_ROWS:
+        return ruled
+    line_height = int(np.median([bottom - top for top, bottom in lines]))
+    cell_gap = max(1, int(line_height * CELL_GAP_LINES))
+    cells = [_runs(ink[top:bottom].any(axis=0), min_gap=cell_gap) for top, bottom in lines]
+
+    blocks = _table_blocks(cells)
+    if not any(rows >= TABLE_MIN_ROWS for _, _, rows in blocks):
+        return ruled
+
+    # Once the page has a table, every block is kept (statements split
+    # transactions into sections, some only a row or two long), then
+    # widened by adjacent label + amount lines such as opening and
+    # closing balances
+    first, last = blocks[0][0], blocks[-1][1]
+    first = _extend(cells, first, -1)
+    last = _extend(cells, last, 1)
+    block_cells = [cell for line_cells in cells[first:last + 1] for cell in line_cells]
+    region = (min(x0 for x0, _ in block_cells), lines[first][0], max(x1 for _, x1 in block_cells), lines[last][1])
+    if ruled is not None:
+        region = (
+            min(region[0], ruled[0]), min(region[1], ruled[1]),
+            max(region[2], ruled[2]), max(region[3], ruled[3]),
+        )
+    # Pad by a line height so clipped ascenders/descenders stay legible
+    return (
+        max(0, region[0] - line_height), max(0, region[1] - line_height),
+        min(w, region[2] + line_height), min(h, region[3] + line_height),
+    )
+
+
+def crop_to_table(binary: np.ndarray, keep_header: bool = False) -> np.ndarray:
+    """
+    ``binary`` cut down to its transaction table. With ``keep_header``
+    everything above the table is kept too (full width): the account
+    number and statement period are printed there on a first page.
+    """
+    region = find_table_region(binary)
+    if region is None:
+        return binary
+    x0, y0, x1, y1 = region
+    if keep_header:
+        return np.ascontiguousarray(binary[:y1])
+    return np.ascontiguousarray(binary[y0:y1, x0:x1])
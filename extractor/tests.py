@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .table_regions import crop_to_table, find_table_region
+from .text_parser import detect_account
+
+SCALE = 200 / 72  # points to pixels at 200 DPI
+COLUMN_X = [40, 110, 330, 420, 500]
+LINE = 12
+
+
+def _font():
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", int(8 * SCALE))
+    except OSError:
+        return ImageFont.load_default()
+
+
+class _Page:
+    """
+    A thresholded A4 page drawn top to bottom, recording where each line went.
+    """
+
+    def __init__(self):
+        self.img = Image.new("L", (int(595 * SCALE), int(842 * SCALE)), 255)
+        self.draw = ImageDraw.Draw(self.img)
+        self.font = _font()
+        self.y = 40
+
+    def text(self, x: float, text: str) -> int:
+        return self.cells([(x, text)])
+
+    def cells(self, cells) -> int:
+        top = int(self.y * SCALE)
+        for x, cell in cells:
+            self.draw.text((x * SCALE, top), cell, fill=0, font=self.font)
+        self.y += LINE
+        return top
+
+    def row(self, i: int) -> int:
+        cells = [f"{i % 28 + 1:02d}-08-2025", f"UPI/{1000 + i}/GROCERY", "40.00", "", f"{500 + i}.00"]
+        return self.cells(zip(COLUMN_X, cells))
+
+    def binary(self) -> np.ndarray:
+        return np.where(np.array(self.img) < 150, 0, 255).astype(np.uint8)
+
+
+class TableRegionTests(unittest.TestCase):
+    def test_keeps_every_transaction_block(self):
+        page = _Page()
+        page.text(40, "ACME BANK - STATEMENT OF ACCOUNT")
+        page.y += 30
+        for i in range(12):
+            page.row(i)
+        page.y += LINE
+        page.text(40, "Card transactions - card ending 4421")
+        page.text(40, "Cardholder: J SMITH")
+        page.text(40, "Card number XXXX XXXX XXXX 4421")
+        page.y += LINE
+        last_top = max(page.row(i) for i in range(12, 20))
+        closing_top = page.cells([(40, "Closing balance"), (500, "519.00")])
+        page.y += 4 * LINE
+        footer_top = page.text(40, "Deposits are insured up to the applicable limits. Terms apply.")
+
+        binary = page.binary()
+        x0, y0, x1, y1 = find_table_region(binary)
+        self.assertGreater(y1, last_top + 8 * SCALE, "second block of rows was cut")
+        self.assertGreater(y1, closing_top + 8 * SCALE, "closing balance line was cut")
+        self.assertLess(y1, footer_top, "footer should stay out of the crop")
+        self.assertEqual(crop_to_table(binary, keep_header=True).shape[0], y1)
+
+    def test_short_trailing_section_is_kept(self):
+        page = _Page()
+        for i in range(10):
+            page.row(i)
+        page.y += LINE
+        page.text(40, "Cheques")
+        page.y += LINE
+        last_top = max(page.row(i) for i in range(10, 12))
+        _, _, _, y1 = find_table_region(page.binary())
+        self.assertGreater(y1, last_top + 8 * SCALE)
+
+    def test_prose_page_has_no_table(self):
+        page = _Page()
+        for _ in range(30):
+            page.text(40, "Lorem ipsum dolor sit amet consectetur adipiscing elit sed do")
+        self.assertIsNone(find_table_region(page.binary()))
+
+
+class DetectAccountTests(unittest.TestCase):
+    def test_statement_period_is_not_an_account(self):
+        self.assertEqual(detect_account("Statement of Account: 01-04-2024 to 30-04-2024"), "")
+        self.assertEqual(detect_account("Account: 01-04-2024"), "")
+        self.assertEqual(detect_account("Account: 20240401"), "")
+
+    def test_account_after_statement_period(self):
+        text = "Statement of Account: 01-04-2024 to 30-04-2024\nA/c No: 5012 3344 8891"
+        self.assertEqual(detect_account(text), "501233448891")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,15 @@
 import re
 from datetime import datetime
 
+from nlp.engine import iter_statement_lines, parse_statement
+
+ACCOUNT_RE = re.compile(
+    r'\b(?:a/?c|account)\s*(?:no\.?|number|#|(?=:))\s*[:\-]?\s*([0-9Xx*][0-9Xx* -]{4,22}[0-9])',
+    re.IGNORECASE,
+)
+# "Account: 01-04-2024 to 30-04-2024" is a statement period, not a number
+DATE_SHAPED_RE = re.compile(r'\d{1,2}[-/. ]\d{1,2}[-/. ]\d{2,4}|\d{4}[-/. ]\d{1,2}[-/. ]\d{1,2}')
+
 
 def normalize_text(text: str) -> list[str]:
     """
@@ -9,15 +18,7 @@ def normalize_text(text: str) -> list[str]:
     - Forces line breaks before dates
     - Splits into clean lines
     """
-    # Collapse multiple spaces
-    text = re.sub(r'\s+', ' ', text)
-
-    # Insert newline before dates (dd-mm-yyyy)
-    text = re.sub(r'(\d{2}-\d{2}-\d{4})', r'\n\1', text)
-
-    # Split and strip
-    lines = [line.strip() for line in text.split("\n") if line.strip()]
-    return lines
+    return list(iter_statement_lines(text))
 
 
 def parse_bank_statement(text: str):
@@ -35,33 +36,34 @@ def parse_bank_statement(text: str):
         ...
     ]
     """
-    transactions = []
-    lines = normalize_text(text)
-
-    for line in lines:
-        # Regex pattern to capture date, narration, debit, credit, balance
-        match = re.match(
-            r'(?P<date>\d{2}-\d{2}-\d{4})\s+'
-            r'(?P<narration>.+?)\s+'
-            r'(?P<debit>[\d,]+\.\d{2})?\s*'
-            r'(?P<credit>[\d,]+\.\d{2})?\s*'
-            r'(?P<balance>[\d,]+\.\d{2})',
-            line
-        )
+    return parse_statement(text)
 
-        if match:
-            txn = match.groupdict()
 
-            # Convert date
-            txn['date'] = datetime.strptime(txn['date'], '%d-%m-%Y').date()
-
-            # Convert to float safely
-            for key in ['debit', 'credit', 'balance']:
-                if txn[key]:
-                    txn[key] = float(txn[key].replace(',', ''))
-                else:
-                    txn[key] = 0.0
+def detect_account(text: str) -> str:
+    """
+    The first account number printed in ``text`` (e.g. "A/c No: 1234 5678"),
+    without separators, or "" if none is found.
+    """
+    for match in ACCOUNT_RE.finditer(text or ""):
+        number = match.group(1).strip()
+        if not _is_date(number):
+            return re.sub(r'[\s-]', '', number)[:64]
+    return ""
 
-            transactions.append(txn)
 
-    return transactions
+def _is_date(number: str) -> bool:
+    """
+    Whether an account-number capture is really a date (dd-mm-yyyy or
+    yyyy-mm-dd, with or without separators).
+    """
+    if DATE_SHAPED_RE.fullmatch(number):
+        return True
+    if len(number) != 8 or not number.isdigit():
+        return False
+    for fmt in ("%d%m%Y", "%Y%m%d"):
+        try:
+            datetime.strptime(number, fmt)
+            return True
+        except ValueError:
+            pass
+    return False
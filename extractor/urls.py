@@ -1,6 +1,13 @@
 from django.urls import path
-from .views import PDFUploadView
+from .async_views import upload_async
+from .stream_views import upload_stream
+from .views import PDFUploadView, ExtractionJobView, UploadTransactionListView, export_upload_transactions
 
 urlpatterns = [
     path('upload/', PDFUploadView.as_view(), name='upload-pdf'),
+    path('upload/async/', upload_async, name='upload-pdf-async'),
+    path('upload/stream/', upload_stream, name='upload-pdf-stream'),
+    path('uploads/<int:pk>/transactions/', UploadTransactionListView.as_view(), name='upload-transactions'),
+    path('uploads/<int:pk>/export/', export_upload_transactions, name='upload-export'),
+    path('jobs/<int:pk>/', ExtractionJobView.as_view(), name='extraction-job'),
 ]
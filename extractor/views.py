@@ -1,17 +1,28 @@
 import os
+import csv
+import hashlib
+import itertools
 import tempfile
 import logging
-from decimal import Decimal
-from django.db import transaction
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.http import content_disposition_header
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.generics import GenericAPIView
-from .serializers import PDFUploadSerializer, TransactionSerializer
-from .pdf_extractor import extract_text_from_pdf
-from .text_parser import parse_bank_statement
-from .models import PDFUpload, Transaction
-from .csv_extractor import extract_text_from_csv
+from rest_framework.generics import GenericAPIView, ListAPIView, RetrieveAPIView
+from rest_framework.pagination import CursorPagination
+from .serializers import PDFUploadSerializer, TransactionSerializer, ExtractionJobSerializer
+from .models import ExtractionJob, PDFUpload, Transaction
+from .services import extract_upload, reusable_upload, save_transactions
+from .text_parser import detect_account
+from .jobs import fail_stale_jobs, submit_job
+from .instrumentation import collect_timings, span
 
 logger = logging.getLogger(__name__)
 
@@ -20,90 +31,216 @@ class PDFUploadView(GenericAPIView):
     parser_classes = (MultiPartParser, FormParser)
 
     def post(self, request):
+        # ?timings=1 attaches a per-stage timing breakdown to the response
+        if request.query_params.get('timings') in ('1', 'true'):
+            with collect_timings() as timings:
+                response = self._post(request)
+            if isinstance(response.data, dict):
+                response.data["timings"] = timings
+            return response
+        return self._post(request)
+
+    def _post(self, request):
         serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         pdf_file = serializer.validated_data['file']
+        # ?mode=job queues extraction and returns immediately with a job id
+        job_mode = (request.query_params.get('mode') or request.data.get('mode')) == 'job'
+        # ?dedup=1 skips rows the account already has from earlier uploads
+        dedup = dedup_requested(request.query_params.get('dedup') or request.data.get('dedup'))
+        account = serializer.validated_data['account'].strip()
 
-        filename = getattr(pdf_file, 'name', '') or ''
-        content_type = getattr(pdf_file, 'content_type', None)
-        _, ext = os.path.splitext(filename)
-        ext = ext.lower()
-
-        allowed_csv_types = {"text/csv", "application/csv", "application/vnd.ms-excel"}
-        is_csv = (ext == '.csv') or (content_type in allowed_csv_types)
+        is_csv = is_csv_upload(pdf_file)
 
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.csv' if is_csv else '.pdf')
-        temp_path = temp_file.name
         try:
-            with open(temp_path, 'wb+') as dest:
+            # Hash straight from Django's upload (memory or its own temp
+            # file); the bytes are not copied anywhere else.
+            with span("upload.receive", bytes=pdf_file.size or 0):
+                hasher = hashlib.sha256()
                 for chunk in pdf_file.chunks():
-                    dest.write(chunk)
-
-            if is_csv:
-                try:
-                    with open(temp_path, 'rb') as f:
-                        parsed = extract_text_from_csv(f)
-                except Exception:
-                    parsed = []
-                extracted_text = "CSV Upload"
+                    hasher.update(chunk)
+                content_hash = hasher.hexdigest()
+
+            # Identical bytes were saved before: point at that upload
+            existing = reusable_upload(content_hash, account, dedup)
+            if existing is not None:
+                body = upload_body(request, existing, existing.transactions.count(), cached=True, duplicate=True)
+                return Response(body, status=status.HTTP_200_OK)
+
+            if job_mode:
+                job = ExtractionJob.objects.create(file_name=getattr(pdf_file, 'name', 'uploaded.pdf'))
+                submit_job(
+                    job, detach_upload(pdf_file, '.csv' if is_csv else '.pdf'), is_csv, content_hash,
+                    account=account, dedup=dedup,
+                )
+                return Response({
+                    "job_id": job.pk,
+                    "status": job.status,
+                    "status_url": request.build_absolute_uri(reverse('extraction-job', args=[job.pk])),
+                }, status=status.HTTP_202_ACCEPTED)
+
+            if isinstance(pdf_file, TemporaryUploadedFile):
+                source = pdf_file.temporary_file_path()
             else:
-                extracted_text = extract_text_from_pdf(temp_path)
-                try:
-                    parsed = parse_bank_statement(extracted_text)
-                except Exception:
-                    parsed = []
-
-            with transaction.atomic():
-                pdf_record = PDFUpload.objects.create(file_name=getattr(pdf_file, 'name', 'uploaded.pdf'))
-
-                transactions_to_create = []
-                for txn in parsed:
-                    debit = txn.get('debit')
-                    credit = txn.get('credit')
-                    balance = txn.get('balance')
-                    transactions_to_create.append(
-                        Transaction(
-                            pdf=pdf_record,
-                            date=txn['date'],
-                            narration=txn['narration'],
-                            debit=Decimal(str(debit)) if debit not in (None, 0, 0.0, "") else None,
-                            credit=Decimal(str(credit)) if credit not in (None, 0, 0.0, "") else None,
-                            balance=Decimal(str(balance)) if balance not in (None, 0, 0.0, "") else None,
-                        )
-                    )
-                if transactions_to_create:
-                    Transaction.objects.bulk_create(transactions_to_create)
-
-            saved_txns = Transaction.objects.filter(pdf=pdf_record).order_by('id')
-
-            return Response({
-                "text": extracted_text,
-                "transactions": TransactionSerializer(saved_txns, many=True).data,
-                "transaction_count": saved_txns.count(),
-            }, status=status.HTTP_200_OK)
+                source = pdf_file.file
+
+            with span("upload.extract"):
+                extracted_text, parsed, cached = extract_upload(source, is_csv, content_hash)
+            with span("upload.save") as save_span:
+                pdf_record, saved, skipped = save_transactions(
+                    getattr(pdf_file, 'name', 'uploaded.pdf'), parsed, content_hash,
+                    account=account or detect_account(extracted_text), dedup=dedup,
+                )
+                save_span.add(rows=saved, skipped=skipped)
+
+            # Rows are fetched through the paginated/streaming endpoints
+            # rather than echoed back in full.
+            body = upload_body(request, pdf_record, saved, cached, skipped=skipped)
+            if 'text' in request.query_params.get('include', '').split(','):
+                body["text"] = extracted_text
+            return Response(body, status=status.HTTP_200_OK)
 
         except Exception as e:
             logger.exception("Failed processing PDF upload")
-            message = str(e)
-            error_type = e.__class__.__name__
-            hint = None
-            lower = message.lower()
-            if "poppler" in lower:
-                hint = "Install Poppler and set POPPLER_PATH or add poppler bin to PATH."
-            elif "tesseract" in lower:
-                hint = "Install Tesseract OCR and add to PATH, or set pytesseract.pytesseract.tesseract_cmd."
-            elif "could not connect to server" in lower or "connection refused" in lower:
-                hint = "Ensure PostgreSQL is running and credentials in settings.py are correct."
-            return Response({
-                "error": message,
-                "error_type": error_type,
-                **({"hint": hint} if hint else {})
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        finally:
-            try:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-            except Exception:
-                pass
+            return Response(error_body(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def is_csv_upload(uploaded_file) -> bool:
+    filename = getattr(uploaded_file, 'name', '') or ''
+    content_type = getattr(uploaded_file, 'content_type', None)
+    _, ext = os.path.splitext(filename)
+    ext = ext.lower()
+
+    allowed_csv_types = {"text/csv", "application/csv", "application/vnd.ms-excel"}
+    return (ext == '.csv') or (content_type in allowed_csv_types)
+
+
+def dedup_requested(value) -> bool:
+    if value is None:
+        return getattr(settings, 'EXTRACTION_DEDUP', False)
+    return value in ('1', 'true')
+
+
+def error_body(e: Exception) -> dict:
+    message = str(e)
+    error_type = e.__class__.__name__
+    hint = None
+    lower = message.lower()
+    if "poppler" in lower:
+        hint = "Install Poppler and set POPPLER_PATH or add poppler bin to PATH."
+    elif "tesseract" in lower:
+        hint = "Install Tesseract OCR and add to PATH, or set pytesseract.pytesseract.tesseract_cmd."
+    elif "could not connect to server" in lower or "connection refused" in lower:
+        hint = "Ensure PostgreSQL is running and credentials in settings.py are correct."
+    return {
+        "error": message,
+        "error_type": error_type,
+        **({"hint": hint} if hint else {})
+    }
+
+
+def detach_upload(uploaded_file, suffix: str) -> str:
+    """
+    Give a background job its own copy of the upload, since Django deletes
+    its upload files when the request ends. A disk-backed upload is moved
+    (a rename on the same filesystem); only in-memory uploads are written.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    if isinstance(uploaded_file, TemporaryUploadedFile):
+        os.close(fd)
+        file_move_safe(uploaded_file.temporary_file_path(), path, allow_overwrite=True)
+    else:
+        with os.fdopen(fd, 'wb') as dest:
+            for chunk in uploaded_file.chunks():
+                dest.write(chunk)
+    return path
+
+
+def upload_body(request, upload: PDFUpload, transaction_count: int, cached: bool,
+                duplicate: bool = False, skipped: int = 0) -> dict:
+    return {
+        "upload_id": upload.pk,
+        "file_name": upload.file_name,
+        "account": upload.account,
+        "transaction_count": transaction_count,
+        "duplicates_skipped": skipped,
+        "cached": cached,
+        "duplicate": duplicate,
+        "transactions_url": request.build_absolute_uri(reverse('upload-transactions', args=[upload.pk])),
+        "export_url": request.build_absolute_uri(reverse('upload-export', args=[upload.pk])),
+    }
+
+
+class TransactionCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size = 500
+    page_size_query_param = 'limit'
+    max_page_size = 5000
+
+
+class UploadTransactionListView(ListAPIView):
+    """
+    Cursor-paginated transactions of one upload, in insertion order.
+    """
+    serializer_class = TransactionSerializer
+    pagination_class = TransactionCursorPagination
+
+    def get_queryset(self):
+        get_object_or_404(PDFUpload, pk=self.kwargs['pk'])
+        return Transaction.objects.filter(pdf_id=self.kwargs['pk'])
+
+
+class _Echo:
+    # File-like object whose write() returns the value, for csv.writer
+    def write(self, value):
+        return value
+
+
+EXPORT_FIELDS = ["date", "narration", "debit", "credit", "balance"]
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_upload_transactions(request, pk):
+    """
+    Stream every transaction of an upload as NDJSON (default) or CSV
+    (?as=csv), reading the queryset in chunks instead of materializing it.
+    """
+    upload = get_object_or_404(PDFUpload, pk=pk)
+    rows = (
+        Transaction.objects.filter(pdf=upload)
+        .order_by('id')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    # file_name is client-supplied: drop control characters (header
+    # injection) and let content_disposition_header quote/encode the rest
+    base_name = "".join(ch for ch in os.path.splitext(upload.file_name)[0] if ch.isprintable())
+    base_name = base_name or f"upload-{upload.pk}"
+
+    if request.GET.get('as') == 'csv':
+        writer = csv.writer(_Echo())
+        lines = itertools.chain(
+            [writer.writerow(EXPORT_FIELDS)],
+            (writer.writerow(row) for row in rows),
+        )
+        response = StreamingHttpResponse(lines, content_type='text/csv')
+        response['Content-Disposition'] = content_disposition_header(True, f"{base_name}.csv")
+        return response
+
+    encoder = DjangoJSONEncoder()
+    lines = (encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n" for row in rows)
+    response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+    response['Content-Disposition'] = content_disposition_header(True, f"{base_name}.ndjson")
+    return response
+
+
+class ExtractionJobView(RetrieveAPIView):
+    queryset = ExtractionJob.objects.select_related('upload')
+    serializer_class = ExtractionJobSerializer
+
+    def get_object(self):
+        # A job whose worker died reads as failed rather than pending forever
+        fail_stale_jobs([self.kwargs['pk']])
+        return super().get_object()
@@ -0,0 +1,135 @@
+"""
+Single-pass statement line parser shared by the upload API
+(extractor.text_parser) and the CLI (nlp.rule_extractor / app.py).
+
+All patterns are compiled once at import. Text is walked with finditer
+and sliced segment by segment, so no whole-text copies are built.
+"""
+import re
+from datetime import date
+from typing import Dict, Iterable, Iterator, List
+
+# --- Grammar used by the API path (dd-mm-yyyy rows) ---
+ROW_DATE = re.compile(r'\d{2}-\d{2}-\d{4}')
+ROW = re.compile(
+    r'(?P<date>\d{2}-\d{2}-\d{4})\s+'
+    r'(?P<narration>.+?)\s+'
+    r'(?P<debit>[\d,]+\.\d{2})?\s*'
+    r'(?P<credit>[\d,]+\.\d{2})?\s*'
+    r'(?P<balance>[\d,]+\.\d{2})'
+)
+
+# --- Grammar used by the rule-based CLI path ---
+RULE_DATE = re.compile(r"\b(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\b")   # e.g. 12/08/2025 or 12-08-25
+RULE_AMOUNT = re.compile(r"[\d,]+\.\d{2}")                        # e.g. 1,234.56
+
+# Lines containing any of these are bank headers/footers
+BOILERPLATE = re.compile(r"statement|page|powered by|confidential|banking")
+
+
+def _collapse(segment: str) -> str:
+    # Same as re.sub(r'\s+', ' ', segment).strip()
+    return ' '.join(segment.split())
+
+
+def iter_statement_lines(text: str) -> Iterator[str]:
+    """
+    Yield one whitespace-collapsed line per dd-mm-yyyy date, plus any
+    leading text before the first date.
+    """
+    start = 0
+    for m in ROW_DATE.finditer(text):
+        line = _collapse(text[start:m.start()])
+        if line:
+            yield line
+        start = m.start()
+    line = _collapse(text[start:])
+    if line:
+        yield line
+
+
+def _amount(value) -> float:
+    return float(value.replace(',', '')) if value else 0.0
+
+
+def parse_statement(text: str) -> List[Dict]:
+    """
+    Parse raw statement text into {'date', 'narration', 'debit', 'credit',
+    'balance'} dicts with date objects and float amounts.
+    """
+    transactions = []
+    for line in iter_statement_lines(text):
+        match = ROW.match(line)
+        if not match:
+            continue
+        txn = match.groupdict()
+        d = txn['date']
+        txn['date'] = date(int(d[6:10]), int(d[3:5]), int(d[0:2]))
+        txn['debit'] = _amount(txn['debit'])
+        txn['credit'] = _amount(txn['credit'])
+        txn['balance'] = _amount(txn['balance'])
+        transactions.append(txn)
+    return transactions
+
+
+def iter_clean_lines(raw_text: str) -> Iterator[str]:
+    """
+    Stripped, non-empty lines of ``raw_text`` minus bank headers/footers.
+    """
+    for line in raw_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if BOILERPLATE.search(line.lower()):
+            continue
+        yield line
+
+
+def extract_rule_rows(lines: Iterable[str]) -> List[Dict]:
+    """
+    Rule-based row extraction: DATE | DESCRIPTION | DEBIT | CREDIT | BALANCE,
+    with amounts kept as strings.
+    """
+    transactions = []
+    for line in lines:
+        date_match = RULE_DATE.search(line)
+        if not date_match:
+            continue
+        amounts = RULE_AMOUNT.findall(line)
+        if not amounts:
+            continue
+
+        row_date = date_match.group(1)
+
+        # Last amount is usually balance
+        balance = amounts[-1]
+
+        # If 2 amounts → debit & balance  OR  credit & balance
+        debit, credit = None, None
+        if len(amounts) == 2:
+            # Heuristic: if line contains "DR" → debit
+            if "DR" in line.upper():
+                debit = amounts[0]
+            else:
+                credit = amounts[0]
+
+        # If 3 amounts → debit, credit, balance
+        elif len(amounts) == 3:
+            debit, credit, balance = amounts
+
+        # Description = text after the first occurrence of the date, up to
+        # the next occurrence of the date and then the first amount
+        after = line.find(row_date) + len(row_date)
+        end = line.find(row_date, after)
+        part = line[after:end] if end != -1 else line[after:]
+        cut = part.find(amounts[0])
+        description = (part[:cut] if cut != -1 else part).strip()
+
+        transactions.append({
+            "date": row_date,
+            "description": description,
+            "debit": debit,
+            "credit": credit,
+            "balance": balance
+        })
+    return transactions
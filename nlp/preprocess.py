@@ -1,29 +1,12 @@
 import re
 from datetime import datetime
+from .engine import iter_clean_lines
 
 def clean_text(raw_text: str) -> str:
     """
     Clean unwanted characters, headers, and footers.
     """
-    lines = raw_text.splitlines()
-    cleaned_lines = []
-
-    for line in lines:
-        line = line.strip()
-
-        # Skip empty lines
-        if not line:
-            continue
-
-        # Skip common bank headers/footers
-        if any(keyword in line.lower() for keyword in [
-            "statement", "page", "powered by", "confidential", "banking"
-        ]):
-            continue
-
-        cleaned_lines.append(line)
-
-    return "\n".join(cleaned_lines)
+    return "\n".join(iter_clean_lines(raw_text))
 
 
 def normalize_date(date_str: str) -> str: